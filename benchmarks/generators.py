@@ -0,0 +1,268 @@
+"""Seeded generators of synthetic payloads shaped like each vendor's JSON."""
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+START = datetime(2025, 1, 1)
+DAYS = 365
+
+ZONES = [f"Zone {i}" for i in range(1, 41)]
+CUSTOMERS = ["Privat", "Erhverv", "Kommune", "Beboer"]
+PAYMENT_METHODS = ["Visa", "Mastercard", "MobilePay", "Dankort"]
+GIANTLEAP_COLUMNS = [
+    "label.report.time",
+    "label.item.description",
+    "label.zone",
+    "label.payer.msisdn",
+    "label.payer",
+    "label.amount",
+    "label.vat",
+    "label.payment.method",
+    "label.payment.card",
+    "label.payment.transaction",
+    "label.note",
+]
+
+
+def _rng(seed: int) -> np.random.Generator:
+    return np.random.default_rng(seed)
+
+
+def _timestamps(
+    rng: np.random.Generator, n: int, start: datetime, days: float
+) -> pd.Series:
+    """Random timestamps spread over `days` days from `start`, at second resolution."""
+    seconds = rng.integers(0, max(int(days * 24 * 3600), 1), size=n)
+    return pd.Series(pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s"))
+
+
+def _durations(rng: np.random.Generator, n: int) -> pd.Series:
+    return pd.Series(pd.to_timedelta(rng.integers(5, 8 * 60, size=n), unit="min"))
+
+
+def _plates(rng: np.random.Generator, n: int) -> pd.Series:
+    letters = np.array(list("ABCDEFGHJKLMNPRSTUVXYZ"))
+    first = letters[rng.integers(0, len(letters), size=n)]
+    second = letters[rng.integers(0, len(letters), size=n)]
+    digits = rng.integers(10_000, 99_999, size=n).astype(str)
+    return pd.Series(first) + pd.Series(second) + pd.Series(digits)
+
+
+def _choice(rng: np.random.Generator, values: list, n: int) -> np.ndarray:
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size=n)]
+
+
+def _ms_date(timestamps: pd.Series) -> pd.Series:
+    """Format timestamps as Scanview's /Date(ms)/ strings."""
+    ms = timestamps.astype("datetime64[ms]").astype("int64")
+    return "/Date(" + ms.astype(str) + ")/"
+
+
+def _iso_utc(timestamps: pd.Series) -> pd.Series:
+    return timestamps.dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def scanview_orders(
+    n: int, seed: int = 0, start: datetime = START, days: float = DAYS
+) -> dict:
+    """Response of Scanview's /Order/GetAll."""
+    rng = _rng(seed)
+    started = _timestamps(rng, n, start, days)
+    df = pd.DataFrame(
+        {
+            "OrderDate": _ms_date(started - pd.Timedelta(minutes=1)),
+            "Name": _choice(rng, ["Parkering", "Abonnement"], n),
+            "Description": _choice(rng, [None, "Weekend", "Nat"], n),
+            "SubscriptionName": _choice(rng, ["Dag", "Uge", "Måned"], n),
+            "StartDate": _ms_date(started),
+            "EndDate": _ms_date(started + _durations(rng, n)),
+            "OrderStatus": _choice(rng, ["Paid", "Cancelled", "Refunded"], n),
+            "LicensePlates": _plates(rng, n),
+            "Customer": _choice(rng, CUSTOMERS, n),
+            "LocationID": rng.integers(1, 40, size=n).astype(str),
+            "LocationName": _choice(rng, ZONES, n),
+            "PaymentMethod": rng.integers(1, 5, size=n),
+            "PaymentMethodName": _choice(rng, PAYMENT_METHODS, n),
+            "AutoRenew": rng.random(n) < 0.1,
+            "Price": rng.integers(0, 500, size=n),
+        }
+    )
+    return {"iTotalRecords": n, "aaData": df.to_dict("records")}
+
+
+def scanview_logs(
+    n: int, seed: int = 0, start: datetime = START, days: float = DAYS
+) -> dict:
+    """Response of Scanview's /ParkingLog/GetAll."""
+    rng = _rng(seed)
+    created = _timestamps(rng, n, start, days)
+    end = created + _durations(rng, n)
+    df = pd.DataFrame(
+        {
+            "AreaName": _choice(rng, ZONES, n),
+            "AreaNo": rng.integers(1, 40, size=n),
+            "CreatedDateUtc": _ms_date(created),
+            "EndDateUtc": _ms_date(end),
+            "Price": rng.integers(0, 500, size=n),
+            "LicensePlate": _plates(rng, n),
+            "PaymentStartUtc": _ms_date(created),
+            "PaymentEndUtc": _ms_date(end),
+            "Handle": rng.random(n) < 0.05,
+            "HandleByType": _choice(rng, ["None", "Camera", "Warden"], n),
+            "HandleBy": _choice(rng, ["", "System", "Operator"], n),
+        }
+    )
+    return {"iTotalRecords": n, "aaData": df.to_dict("records")}
+
+
+def solvision_transactions(
+    n: int, seed: int = 0, start: datetime = START, days: float = DAYS
+) -> dict:
+    """Response of Solvision's reports/transactions endpoint."""
+    rng = _rng(seed)
+    started = _timestamps(rng, n, start, days)
+    duration = _durations(rng, n)
+    df = pd.DataFrame(
+        {
+            "id": rng.integers(1, 72, size=n),
+            "deviceName": _choice(rng, ZONES, n),
+            "card": _choice(rng, ["**** 1234", "**** 9876", "App"], n),
+            "paymentTime": _iso_utc(started),
+            "plate": _plates(rng, n),
+            "start": _iso_utc(started),
+            "end": _iso_utc(started + duration),
+            "rateType": _choice(rng, [None, "Normal", "Beboer"], n),
+            "discountCode": _choice(rng, [None, "RABAT10"], n),
+            "discountType": _choice(rng, [None, "Percent"], n),
+            "cardFirm": _choice(rng, PAYMENT_METHODS, n),
+            "cardCount": np.ones(n, dtype=int),
+            "amount": rng.integers(0, 50_000, size=n) / 100,
+            "fee": rng.integers(0, 300, size=n),
+            "parkingTime": (duration.dt.total_seconds() // 60).astype(int),
+        }
+    )
+    return {"result": {"data": df.to_dict("records")}}
+
+
+def giantleap_report(
+    n: int,
+    seed: int = 0,
+    start: datetime = START,
+    days: float = DAYS,
+    first_id: int = 1,
+) -> dict:
+    """Response of Giantleap's payment-txn-report/preview.json."""
+    rng = _rng(seed)
+    amount = rng.integers(0, 1_000_000, size=n) / 100
+    df = pd.DataFrame(
+        {
+            "report_time": _timestamps(rng, n, start, days).dt.strftime(
+                "%d.%m.%Y %H:%M"
+            ),
+            "description": _choice(rng, ["Beboerlicens", "Erhvervslicens"], n),
+            "zone": _choice(rng, ZONES, n),
+            "msisdn": "45" + pd.Series(rng.integers(10**7, 10**8, size=n).astype(str)),
+            "payer": _choice(rng, ["Jens  Hansen", "Mette Jensen ", "Ole Olsen"], n),
+            # Danish number formatting, e.g. "1 234,50"
+            "amount": pd.Series(amount)
+            .map("{:,.2f}".format)
+            .str.replace(",", " ")
+            .str.replace(".", ","),
+            "vat": pd.Series(amount * 0.2).map("{:.2f}".format).str.replace(".", ","),
+            "payment_method": _choice(rng, PAYMENT_METHODS, n),
+            "payment_card": _choice(rng, ["**** 1234", "**** 9876"], n),
+            "payment_transaction": np.arange(first_id, first_id + n) + 1_000_000,
+            "note": _choice(rng, [None, "Refusion"], n),
+        }
+    )
+    rows = [{"columns": row} for row in df.to_numpy().tolist()]
+    return {"headers": {"columns": GIANTLEAP_COLUMNS}, "rows": rows}
+
+
+def parkpark_parkings(
+    n: int,
+    seed: int = 0,
+    start: datetime = START,
+    days: float = DAYS,
+    first_id: int = 1,
+) -> dict:
+    """Response of ParkPark's report/parkings."""
+    rng = _rng(seed)
+    checkin = _timestamps(rng, n, start, days)
+    duration = _durations(rng, n)
+    df = pd.DataFrame(
+        {
+            "parking_id": np.arange(first_id, first_id + n),
+            "external_id": _choice(rng, [None, "ext-1", "ext-2"], n),
+            "zone_name": _choice(rng, ZONES + [""], n),
+            "reg_cc": _choice(rng, ["dk", "de", "se"], n),
+            "reg": _plates(rng, n).str.lower(),
+            "checkin": checkin.dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "checkout": (checkin + duration).dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "minutes": (duration.dt.total_seconds() // 60).astype(int),
+            "amount": rng.integers(0, 50_000, size=n),
+        }
+    )
+    return {"data": {"parkings": df.to_dict("records")}}
+
+
+def parkone_parkings(
+    n: int,
+    seed: int = 0,
+    start: datetime = START,
+    days: float = DAYS,
+    first_id: int = 1,
+) -> list[dict]:
+    """Response of ParkOne's Parkings/getAllParkings."""
+    rng = _rng(seed)
+    started = _timestamps(rng, n, start, days)
+    df = pd.DataFrame(
+        {
+            "parkingStartTime": _iso_utc(started),
+            "parkingStopAt": _iso_utc(started + _durations(rng, n)),
+            "vehicleRegId": _plates(rng, n),
+            "municipality": "vejle",
+            "zone": _choice(rng, ZONES, n),
+            "totalAmount": rng.integers(0, 50_000, size=n) / 100,
+            "parkoneParkingId": np.arange(first_id, first_id + n),
+            "externalParkingId": _choice(rng, [None, "ext-1"], n),
+        }
+    )
+    return df.to_dict("records")
+
+
+def easypark_parkings(
+    n: int,
+    seed: int = 0,
+    start: datetime = START,
+    days: float = DAYS,
+    first_id: int = 1,
+) -> list[dict]:
+    """Response of EasyPark's operator-parkings-standard export."""
+    rng = _rng(seed)
+    started = _timestamps(rng, n, start, days)
+    fee = rng.integers(0, 50_000, size=n) / 100
+    df = pd.DataFrame(
+        {
+            "areaNo": rng.integers(1, 200, size=n),
+            "areaCountryCode": "DK",
+            "startDate": started.dt.strftime("%Y-%m-%dT%H:%M:%S.000+02:00"),
+            "endDate": (started + _durations(rng, n)).dt.strftime(
+                "%Y-%m-%dT%H:%M:%S.000+02:00"
+            ),
+            "licenseNumber": _plates(rng, n),
+            "parkingFeeExclusiveVAT": fee * 0.8,
+            "parkingFeeInclusiveVAT": fee,
+            "parkingFeeVAT": fee * 0.2,
+            "currency": "DKK",
+            "parkingId": np.arange(first_id, first_id + n),
+            "stopped": rng.random(n) < 0.9,
+            "sourceSystem": _choice(rng, ["APP", "SMS", None], n),
+            "subType": _choice(rng, [None, "STANDARD"], n),
+            "spotNumber": _choice(rng, [None, "12", "13"], n),
+            "areaName": _choice(rng, ZONES, n),
+            "externalTransactionNumber": _choice(rng, [None, "tx-1"], n),
+        }
+    )
+    return df.to_dict("records")
@@ -0,0 +1,314 @@
+"""
+Offline benchmarks of the transform and storage paths.
+
+Usage:
+    python -m benchmarks.run --sizes 10000 100000 1000000 --sources parkone easypark
+    python -m benchmarks.run --baseline benchmarks/results/previous.json
+
+Every stage runs against synthetic payloads from benchmarks.generators and a
+temporary SQLite database, and the results are written as JSON.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+# Never touch the configured database: point the pipeline at a temporary one
+# before any database module creates its engine.
+_TMP_DIR = tempfile.mkdtemp(prefix="parkering-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'bench.db')}"
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import delete
+import database.operations as db_ops
+from benchmarks import generators
+from database.models import (
+    EasyPark,
+    Giantleap,
+    ParkOne,
+    ParkPark,
+    Scanview,
+    ScanviewLog,
+    Solvision,
+)
+from main import build_models
+from transform import set_transform_workers
+from webscraper.giantleap import DataFetcher as GiantleapFetcher
+from webscraper.parkone import ParkOneAPI
+from webscraper.scanview import BaseDataFetcher as ScanviewFetcher
+from webscraper.solvision import DataFetcher as SolvisionFetcher
+from webscraper import timestamps
+
+SIZES = [10_000, 100_000, 1_000_000]
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# name: (payload generator, parse step of the scraper, model)
+BENCHMARKS: dict[str, tuple[Callable, Callable, type]] = {
+    "scanview": (
+        generators.scanview_orders,
+        lambda payload: ScanviewFetcher.normalize(pd.DataFrame(payload["aaData"])),
+        Scanview,
+    ),
+    "scanview_log": (
+        generators.scanview_logs,
+        lambda payload: ScanviewFetcher.normalize(pd.DataFrame(payload["aaData"])),
+        ScanviewLog,
+    ),
+    "solvision": (
+        generators.solvision_transactions,
+        lambda payload: SolvisionFetcher.parse_transactions(payload["result"]["data"]),
+        Solvision,
+    ),
+    "giantleap": (
+        generators.giantleap_report,
+        GiantleapFetcher.parse_report,
+        Giantleap,
+    ),
+    "parkpark": (
+        generators.parkpark_parkings,
+        lambda payload: pd.DataFrame(payload["data"]["parkings"]),
+        ParkPark,
+    ),
+    "parkone": (
+        generators.parkone_parkings,
+        lambda payload: ParkOneAPI.parse_parkings(pd.DataFrame(payload)),
+        ParkOne,
+    ),
+    "easypark": (generators.easypark_parkings, pd.DataFrame, EasyPark),
+}
+
+
+def _timed(func: Callable, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _upsert(records: list) -> int:
+    with db_ops.get_db() as db:
+        return db_ops.upsert_records(db, records, records.model)
+
+
+def _diff_upsert(records: list) -> db_ops.UpsertCounts:
+    """The writer's path: only rows whose content hash differs are upserted."""
+    with db_ops.get_db() as db:
+        diff = db_ops.diff_rows(db, records, records.model)
+        return db_ops.upsert_diff(db, diff, records.model)
+
+
+def benchmark_source(name: str, rows: int, seed: int) -> list[dict]:
+    generate, parse, model_class = BENCHMARKS[name]
+    payload = generate(rows, seed)
+    stages = []
+
+    df, seconds = _timed(parse, payload)
+    stages.append(("parse", seconds))
+    records, seconds = _timed(build_models, model_class, df)
+    stages.append(("build_models", seconds))
+
+    with db_ops.get_db() as db:
+        db.execute(delete(model_class))
+    _, seconds = _timed(_upsert, records)
+    stages.append(("upsert_insert", seconds))
+    # Re-running the same rows measures the nightly case where rows already exist
+    _, seconds = _timed(_upsert, records)
+    stages.append(("upsert_update", seconds))
+    _, seconds = _timed(_diff_upsert, records)
+    stages.append(("diff_upsert_update", seconds))
+
+    return [
+        {
+            "source": name,
+            "stage": stage,
+            "rows": rows,
+            "seconds": round(seconds, 6),
+            "rows_per_second": round(rows / seconds, 1) if seconds else None,
+        }
+        for stage, seconds in stages
+    ]
+
+
+def benchmark_timestamps(rows: int, seed: int) -> list[dict]:
+    """Each parser of webscraper.timestamps on a column of `rows` vendor timestamps."""
+    instants = generators._timestamps(
+        generators._rng(seed), rows, generators.START, generators.DAYS
+    )
+    columns = {
+        "parse_ms_date": (timestamps.parse_ms_date, generators._ms_date(instants)),
+        "parse_iso_utc_to_local": (
+            timestamps.parse_iso_utc_to_local,
+            generators._iso_utc(instants),
+        ),
+        "parse_day_first": (
+            timestamps.parse_day_first,
+            instants.dt.strftime("%d.%m.%Y %H:%M"),
+        ),
+        "parse_format": (
+            partial(timestamps.parse_format, format="%Y-%m-%dT%H:%M:%S", cut_at=".+"),
+            instants.dt.strftime("%Y-%m-%dT%H:%M:%S.000+02:00"),
+        ),
+    }
+    # The DST transition table is built once per process, not per column
+    timestamps.transitions()
+    results = []
+    for stage, (parse, values) in columns.items():
+        _, seconds = _timed(parse, values)
+        results.append(
+            {
+                "source": "timestamps",
+                "stage": stage,
+                "rows": rows,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(rows / seconds, 1) if seconds else None,
+            }
+        )
+    return results
+
+
+def benchmark_startup(repeat: int = 3) -> dict:
+    """
+    Wall time of a fresh interpreter importing main.py and opening the
+    database, the fixed cost paid by every run. Best of `repeat`.
+    """
+    code = "import main, database.operations as db_ops; db_ops.get_db().__enter__()"
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent.parent,
+            env=os.environ,
+            check=True,
+        )
+        timings.append(time.perf_counter() - started)
+    return {
+        "source": "main",
+        "stage": "cold_start",
+        "rows": 0,
+        "seconds": round(min(timings), 6),
+        "rows_per_second": None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Stages that are more than `tolerance` slower than in the baseline."""
+    previous = {(r["source"], r["stage"], r["rows"]): r["seconds"] for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["source"], result["stage"], result["rows"]))
+        if before and result["seconds"] > before * (1 + tolerance):
+            regressions.append(
+                f"{result['source']}/{result['stage']} at {result['rows']} rows: "
+                f"{before:.3f}s -> {result['seconds']:.3f}s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES[:2])
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=[*BENCHMARKS, "timestamps"],
+        default=[*BENCHMARKS, "timestamps"],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/)")
+    parser.add_argument("--baseline", help="Earlier result file to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline before failing (0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--transform-workers",
+        type=int,
+        default=1,
+        help="Processes mapping frames large enough to be chunked",
+    )
+    parser.add_argument(
+        "--upsert-batch-size",
+        type=int,
+        default=db_ops.UPSERT_BATCH_SIZE,
+        help="Rows per executemany call of the upserts",
+    )
+    args = parser.parse_args()
+    set_transform_workers(args.transform_workers)
+    db_ops.set_upsert_batch_size(args.upsert_batch_size)
+
+    results = [benchmark_startup()]
+    print(f"{'main':<13} {'cold_start':<22} {results[0]['seconds']:>25.3f}s")
+    for rows in args.sizes:
+        for name in args.sources:
+            if name == "timestamps":
+                stages = benchmark_timestamps(rows, args.seed)
+            else:
+                stages = benchmark_source(name, rows, args.seed)
+            for result in stages:
+                print(
+                    f"{result['source']:<13} {result['stage']:<22} "
+                    f"{result['rows']:>9} rows {result['seconds']:>10.3f}s "
+                    f"{result['rows_per_second'] or 0:>12.0f} rows/s"
+                )
+                results.append(result)
+
+    output = Path(
+        args.output
+        or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "meta": {
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                    "commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "sqlalchemy": sqlalchemy.__version__,
+                    "seed": args.seed,
+                    "transform_workers": args.transform_workers,
+                    "upsert_batch_size": args.upsert_batch_size,
+                },
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+Local stand-ins for the vendor portals and APIs, for offline load testing.
+
+Usage:
+    python -m benchmarks.stub_servers --rows-per-day 2000 --latency 0.2 --error-rate 0.05
+
+Every vendor gets its own server on consecutive ports from --port, serving the
+same paths as the real host. The printed environment variables point the
+clients at the stubs; any non-empty credentials are accepted. Rows are
+generated per whole day from benchmarks.generators, seeded by vendor and day,
+so overlapping requests return identical rows.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlparse
+from benchmarks import generators
+
+TOKEN = "stub-token"
+
+
+@dataclass
+class StubConfig:
+    rows_per_day: int = 500
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def _days(start: datetime, end: datetime) -> list[datetime]:
+    """Whole days touched by [start, end), at least the day of `start`."""
+    day = datetime(start.year, start.month, start.day)
+    days = [day]
+    while day + timedelta(days=1) < end:
+        day += timedelta(days=1)
+        days.append(day)
+    return days
+
+
+def _parse_date(value: str) -> datetime:
+    """Parse the date formats the clients send, dropping any UTC offset."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _login_page(title: str, username: dict, password: dict, token_key: str, token: str):
+    """
+    Single page app login: submitting stores a token in localStorage the way
+    the portal does, and the form is hidden once a token exists.
+    """
+
+    def attrs(selector: dict) -> str:
+        return " ".join(f'{key}="{value}"' for key, value in selector.items())
+
+    return f"""<!doctype html>
+<html><head><title>{title}</title></head>
+<body>
+<form id="login">
+  <input type="text" {attrs(username)}>
+  <input type="password" {attrs(password)}>
+  <button type="submit">Log ind</button>
+</form>
+<script>
+  const form = document.getElementById("login");
+  if (localStorage.getItem("{token_key}")) form.remove();
+  form.addEventListener("submit", (event) => {{
+    event.preventDefault();
+    localStorage.setItem("{token_key}", {json.dumps(token)});
+    form.remove();
+  }});
+</script>
+</body></html>"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Shared plumbing of the vendor stubs. Subclasses route in do_GET/do_POST."""
+
+    server: "StubServer"
+    # report name: generates the payload rows of one day (n, seed, day, first_id)
+    reports: dict[str, Callable[[int, int, datetime, int], list]]
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def path_only(self) -> str:
+        return urlparse(self.path).path
+
+    def query(self) -> dict[str, str]:
+        return {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+    def body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def form(self) -> dict[str, str]:
+        return {k: v[0] for k, v in parse_qs(self.body().decode()).items()}
+
+    def send_json(self, data, status: int = 200) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_html(self, html: str) -> None:
+        body = html.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location: str, cookie: str | None = None) -> None:
+        self.send_response(302)
+        self.send_header("Location", location)
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def simulate_network(self) -> bool:
+        """Apply the configured latency and return False if the request should fail."""
+        config = self.server.config
+        time.sleep(max(config.latency + random.uniform(-1, 1) * config.jitter, 0))
+        if random.random() < config.error_rate:
+            self.send_json({"error": "Injected failure"}, status=503)
+            return False
+        return True
+
+    def authorized(self, header: str, value: str) -> bool:
+        if self.headers.get(header) != value:
+            self.send_json({"error": "Unauthorized"}, status=401)
+            return False
+        return True
+
+    def rows(self, report: str, start: datetime, end: datetime) -> list:
+        return [
+            row
+            for day in _days(start, end)
+            for row in self.server.rows_of_day(report, day)
+        ]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler: type[StubHandler], name: str, config: StubConfig):
+        super().__init__(address, handler)
+        self.name = name
+        self.config = config
+        self.rows_of_day = lru_cache(maxsize=4096)(self._generate_day)
+
+    def _generate_day(self, report: str, day: datetime) -> list:
+        ordinal = day.toordinal()
+        salt = zlib.crc32(f"{self.name}/{report}".encode())
+        generate = self.RequestHandlerClass.reports[report]
+        return generate(
+            self.config.rows_per_day,
+            self.config.seed * 1_000_003 + salt * 10_007 + ordinal,
+            day,
+            # Ids stay unique across days as long as rows_per_day < 1_000_000
+            ordinal * 1_000_000,
+        )
+
+
+class ScanviewHandler(StubHandler):
+    """admin.scanviewpay.dk: cookie login form and the DataTables endpoints."""
+
+    reports = {
+        "/Order/GetAll": lambda n, seed, day, first_id: generators.scanview_orders(
+            n, seed, day, days=1
+        )["aaData"],
+        "/ParkingLog/GetAll": lambda n, seed, day, first_id: generators.scanview_logs(
+            n, seed, day, days=1
+        )["aaData"],
+    }
+
+    def do_GET(self):
+        if self.path_only == "/Account/Login":
+            self.send_html(
+                """<!doctype html><html><body>
+<form method="post" action="/Account/Login">
+  <input id="Email" name="Email"><input id="Password" name="Password" type="password">
+  <button type="submit">Log in</button>
+</form></body></html>"""
+            )
+        elif "stub_session" in (self.headers.get("Cookie") or ""):
+            self.send_html("<!doctype html><html><body>ScanviewPay</body></html>")
+        else:
+            self.redirect("/Account/Login")
+
+    def do_POST(self):
+        if self.path_only == "/Account/Login":
+            self.body()
+            return self.redirect("/", cookie="stub_session=1; Path=/")
+        if self.path_only not in self.reports:
+            return self.send_json({"error": "Not found"}, status=404)
+        form = self.form()
+        if not self.simulate_network():
+            return
+        rows = self.rows(
+            self.path_only, _parse_date(form["DateFrom"]), _parse_date(form["DateTo"])
+        )
+        offset = int(form.get("start", 0))
+        length = int(form.get("length", len(rows)))
+        self.send_json(
+            {
+                "draw": int(form.get("draw", 1)),
+                "iTotalRecords": len(rows),
+                "iTotalDisplayRecords": len(rows),
+                "aaData": rows[offset : offset + length],
+            }
+        )
+
+
+class SolvisionHandler(StubHandler):
+    """portal.solvision.dk and api.solvision.dk on one port."""
+
+    endpoint = "/mobilbase/api/v1/reports/transactions/72/0"
+
+    reports = {
+        "transactions": lambda n, seed, day, first_id: generators.solvision_transactions(
+            n, seed, day, days=1
+        )["result"]["data"]
+    }
+
+    def do_GET(self):
+        self.send_html(
+            _login_page(
+                "Solvision",
+                {"id": "username"},
+                {"id": "password"},
+                token_key="token",
+                token=TOKEN,
+            )
+        )
+
+    def do_POST(self):
+        if self.path_only != self.endpoint:
+            return self.send_json({"error": "Not found"}, status=404)
+        payload = json.loads(self.body())
+        if not self.authorized("Authorization", f"Bearer {TOKEN}"):
+            return
+        if not self.simulate_network():
+            return
+        rows = self.rows(
+            "transactions", _parse_date(payload["Start"]), _parse_date(payload["End"])
+        )
+        total = {
+            "cardFirm": "Total",
+            "amount": round(sum(row["amount"] for row in rows), 2),
+            "cardCount": len(rows),
+        }
+        self.send_json({"result": {"data": rows + [total]}})
+
+
+class GiantleapHandler(StubHandler):
+    """vejle-permit.giantleap.no: admin app login and the report preview."""
+
+    endpoint = "/api/admin/reports/payment-txn-report/preview.json"
+
+    reports = {
+        "payment-txn-report": lambda n, seed, day, first_id: generators.giantleap_report(
+            n, seed, day, days=1, first_id=first_id
+        )["rows"]
+    }
+
+    def do_GET(self):
+        self.send_html(
+            _login_page(
+                "Giantleap",
+                {"placeholder": "Brugernavn.."},
+                {"placeholder": "adgangskode.."},
+                token_key="accessToken_admin",
+                token=json.dumps({"value": TOKEN}),
+            )
+        )
+
+    def do_POST(self):
+        if self.path_only != self.endpoint:
+            return self.send_json({"error": "Not found"}, status=404)
+        payload = json.loads(self.body())
+        if not self.authorized("X-Token", TOKEN):
+            return
+        if not self.simulate_network():
+            return
+        time_range = json.loads(payload["parameters"][0]["valueObject"])
+        rows = self.rows(
+            "payment-txn-report",
+            _parse_date(time_range["from"]),
+            _parse_date(time_range["to"]),
+        )
+        self.send_json(
+            {"headers": {"columns": generators.GIANTLEAP_COLUMNS}, "rows": rows}
+        )
+
+
+class ParkParkHandler(StubHandler):
+    """spark.parkpark.dk operator reports."""
+
+    prefix = "/api/ignition/operator/report/"
+
+    reports = {
+        "parkings": lambda n, seed, day, first_id: generators.parkpark_parkings(
+            n, seed, day, days=1, first_id=first_id
+        )["data"]["parkings"]
+    }
+
+    def do_GET(self):
+        endpoint = self.path_only.removeprefix(self.prefix)
+        if endpoint not in ("parkings", "creditnotes", "overview"):
+            return self.send_json({"error": "Not found"}, status=404)
+        if not self.headers.get("x-api-key"):
+            return self.send_json({"error": "Unauthorized"}, status=401)
+        if not self.simulate_network():
+            return
+        query = self.query()
+        if endpoint == "overview":
+            return self.send_json({"data": {"parking_overview": []}})
+        rows = []
+        if endpoint == "parkings":
+            rows = self.rows(
+                endpoint, _parse_date(query["start"]), _parse_date(query["end"])
+            )
+        self.send_json({"data": {endpoint: rows}})
+
+
+class ParkOneHandler(StubHandler):
+    """api.parkone.dk/v1."""
+
+    reports = {
+        "parkings": lambda n, seed, day, first_id: generators.parkone_parkings(
+            n, seed, day, days=1, first_id=first_id
+        )
+    }
+
+    def do_GET(self):
+        if self.path_only != "/v1/Parkings/getAllParkings":
+            return self.send_json({"error": "Not found"}, status=404)
+        if not self.headers.get("authorization"):
+            return self.send_json({"error": "Unauthorized"}, status=401)
+        if not self.simulate_network():
+            return
+        query = self.query()
+        self.send_json(
+            self.rows(
+                "parkings",
+                _parse_date(query["startDate"]),
+                _parse_date(query["endDate"]),
+            )
+        )
+
+
+class EasyParkHandler(StubHandler):
+    """sso.easyparksystem.net and external-gw.easyparksystem.net on one port."""
+
+    reports = {
+        "parkings": lambda n, seed, day, first_id: generators.easypark_parkings(
+            n, seed, day, days=1, first_id=first_id
+        )
+    }
+
+    def do_POST(self):
+        if self.path_only != "/api/login":
+            return self.send_json({"error": "Not found"}, status=404)
+        credentials = json.loads(self.body())
+        if not credentials.get("userName") or not credentials.get("password"):
+            return self.send_json({"error": "Bad credentials"}, status=401)
+        self.send_json({"idToken": TOKEN, "refreshToken": TOKEN})
+
+    def do_GET(self):
+        if self.path_only != "/api/export/operator-parkings-standard":
+            return self.send_json({"error": "Not found"}, status=404)
+        if not self.authorized("X-Authorization", f"Bearer {TOKEN}"):
+            return
+        if not self.simulate_network():
+            return
+        query = self.query()
+        self.send_json(
+            self.rows("parkings", _parse_date(query["from"]), _parse_date(query["to"]))
+        )
+
+
+# name: (handler, environment variables pointing a client at the stub: path)
+STUBS: dict[str, tuple[type[StubHandler], dict[str, str]]] = {
+    "scanview": (ScanviewHandler, {"SCANVIEW_BASE_URL": ""}),
+    "solvision": (SolvisionHandler, {"SOLVISION_BASE_URL": "", "SOLVISION_API_URL": ""}),
+    "giantleap": (GiantleapHandler, {"GIANTLEAP_BASE_URL": ""}),
+    "parkpark": (ParkParkHandler, {"PARKPARK_BASE_URL": ParkParkHandler.prefix[1:]}),
+    "parkone": (ParkOneHandler, {"PARKONE_BASE_URL": "v1/"}),
+    "easypark": (EasyParkHandler, {"EASYPARK_SSO_URL": "", "EASYPARK_BASE_URL": ""}),
+}
+
+
+def start_stubs(
+    config: StubConfig, host: str = "127.0.0.1", port: int = 8800
+) -> tuple[list[StubServer], dict[str, str]]:
+    """
+    Start all stub servers in background threads.
+
+    Returns:
+        The running servers and the environment variables that point the
+        clients at them.
+    """
+    servers = []
+    env = {}
+    for offset, (name, (handler, urls)) in enumerate(STUBS.items()):
+        server = StubServer((host, port + offset), handler, name, config)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        for env_name, path in urls.items():
+            env[env_name] = f"http://{host}:{port + offset}/{path}"
+    return servers, env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800, help="First of six ports")
+    parser.add_argument("--rows-per-day", type=int, default=StubConfig.rows_per_day)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of latency")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests answered 503"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        rows_per_day=args.rows_per_day,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    servers, env = start_stubs(config, args.host, args.port)
+    for env_name, url in env.items():
+        print(f"{env_name}={url}")
+    print("Stub servers running, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
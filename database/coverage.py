@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from database.models import FetchWindow
+from webscraper.utils import DateRange
+from webscraper.window_log import WindowResult
+
+SUCCESS = "SUCCESS"
+FAILED = "FAILED"
+
+
+def _settled_until(window: FetchWindow, lookback: timedelta) -> datetime:
+    """
+    End of the part of a window that is final. Rows younger than the lookback
+    when the window was fetched may still have changed since.
+    """
+    return min(window.window_end, window.fetched_at - lookback)
+
+
+def has_coverage(session: Session, source: str) -> bool:
+    """Whether the ledger has any entry for `source`."""
+    query = select(FetchWindow.id).where(FetchWindow.source == source).limit(1)
+    return session.scalar(query) is not None
+
+
+def seed_coverage(
+    session: Session, source: str, start: datetime, ingested_until: datetime
+) -> None:
+    """Record the history ingested before the ledger existed as one fetched window."""
+    if ingested_until > start:
+        session.add(
+            FetchWindow(
+                source=source,
+                window_start=start,
+                window_end=ingested_until,
+                status=SUCCESS,
+                row_count=None,
+                fetched_at=ingested_until,
+            )
+        )
+
+
+def missing_windows(
+    session: Session,
+    source: str,
+    start: datetime,
+    end: datetime,
+    lookback: timedelta,
+) -> list[DateRange]:
+    """
+    Parts of [start, end) that still have to be fetched: never fetched, failed,
+    or fetched while they were within the lookback (stale).
+    """
+    windows = session.scalars(
+        select(FetchWindow)
+        .where(
+            FetchWindow.source == source,
+            FetchWindow.status == SUCCESS,
+            FetchWindow.window_end > start,
+            FetchWindow.window_start < end,
+        )
+        .order_by(FetchWindow.window_start)
+    ).all()
+
+    gaps = []
+    cursor = start
+    for window in windows:
+        settled = _settled_until(window, lookback)
+        if settled <= cursor:
+            continue
+        if window.window_start > cursor:
+            gaps.append(DateRange(cursor, window.window_start))
+        cursor = settled
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append(DateRange(cursor, end))
+    return gaps
+
+
+def record_windows(
+    session: Session,
+    source: str,
+    windows: list[WindowResult],
+    lookback: timedelta,
+) -> None:
+    """
+    Add fetched windows to the ledger.
+
+    Every window replaces the failed entries it overlaps, so a window failing
+    run after run keeps a single entry. A successful window also replaces the
+    entries it covers and absorbs an earlier successful window that is settled
+    up to its start, so contiguous history collapses into a single entry. `row_count` is the number of rows returned
+    by the latest fetch. Sources fetching several reports (Scanview) report
+    windows per report, so a window overlapping a failed one counts as failed.
+    """
+    failed = [result.date_range for result in windows if not result.ok]
+    for result in sorted(windows, key=lambda result: result.date_range.start):
+        start, end = result.date_range.start, result.date_range.end
+        ok = result.ok and not any(
+            other.start < end and start < other.end for other in failed
+        )
+        session.execute(
+            delete(FetchWindow).where(
+                FetchWindow.source == source,
+                FetchWindow.status == FAILED,
+                FetchWindow.window_start < end,
+                FetchWindow.window_end > start,
+            )
+        )
+        if ok:
+            earlier = session.scalars(
+                select(FetchWindow).where(
+                    FetchWindow.source == source,
+                    FetchWindow.status == SUCCESS,
+                    FetchWindow.window_start < start,
+                    FetchWindow.window_end >= start,
+                    FetchWindow.window_end <= end,
+                )
+            ).all()
+            for window in earlier:
+                if _settled_until(window, lookback) >= start:
+                    start = min(start, window.window_start)
+            session.execute(
+                delete(FetchWindow).where(
+                    FetchWindow.source == source,
+                    FetchWindow.window_start >= start,
+                    FetchWindow.window_end <= end,
+                )
+            )
+        session.add(
+            FetchWindow(
+                source=source,
+                window_start=start,
+                window_end=end,
+                status=SUCCESS if ok else FAILED,
+                row_count=result.rows,
+                fetched_at=result.fetched_at,
+            )
+        )
+        # The session does not autoflush, later windows must see this one
+        session.flush()
@@ -0,0 +1,31 @@
+import pandas as pd
+from database.mapping import MODEL_FIELDS
+from database.operations import MODEL_INDEX_ELEMENTS
+
+
+def key_columns(model_class: type) -> list[str]:
+    """Columns of the fetched DataFrame the model's unique key is built from."""
+    fields = MODEL_FIELDS.get(model_class, {})
+    return [
+        fields[column].source
+        for column in MODEL_INDEX_ELEMENTS.get(model_class, [])
+        if column in fields
+    ]
+
+
+def drop_duplicate_keys(model_class: type, data: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """
+    Drop fetched rows whose unique key repeats, keeping the last fetched one as
+    ON CONFLICT DO UPDATE would. Overlapping windows return the same rows twice.
+
+    Returns:
+        The rows with unique keys and the number of rows dropped
+    """
+    keys = key_columns(model_class)
+    if data.empty or not keys or not set(keys) <= set(data.columns):
+        return data, 0
+    # Rows with part of the key missing are left to validation
+    duplicated = data.duplicated(subset=keys, keep="last") & data[keys].notna().all(axis=1)
+    if not duplicated.any():
+        return data, 0
+    return data[~duplicated], int(duplicated.sum())
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from database.operations import MODEL_EVENT_TIME
+
+
+def daily_row_counts(session: Session, model_class: type, since: datetime) -> list[int]:
+    """Number of stored rows per day of `model_class` since `since`."""
+    event_column = model_class.__table__.c[MODEL_EVENT_TIME[model_class]]
+    day = func.date(event_column)
+    stmt = (
+        select(func.count())
+        .where(event_column >= since)
+        .group_by(day)
+    )
+    return list(session.execute(stmt).scalars())
+
+
+def peak_rows_per_day(
+    session: Session, model_class: type, days: int = 90
+) -> float | None:
+    """
+    Highest number of rows on a single day during the last `days` days.
+    Sizing windows from the peak keeps busy days under the vendor caps.
+    """
+    counts = daily_row_counts(session, model_class, datetime.now() - timedelta(days=days))
+    return float(max(counts)) if counts else None
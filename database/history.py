@@ -0,0 +1,67 @@
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from database.models import Logs, RunSpan, SourceRun
+
+
+def source_run_history(session: Session, since: datetime) -> pd.DataFrame:
+    """
+    Rows, timings and median request time of every source that was stored
+    without errors in a logged run since `since`, one row per run and source.
+    """
+    runs = pd.DataFrame(
+        session.execute(
+            select(
+                Logs.id.label("log_id"),
+                Logs.run_time,
+                Logs.scheduled,
+                SourceRun.source,
+                func.sum(SourceRun.rows).label("rows"),
+                # Every table of a source is fetched together
+                func.max(SourceRun.fetch_seconds).label("fetch_seconds"),
+                func.sum(SourceRun.write_seconds).label("write_seconds"),
+            )
+            .join(SourceRun, SourceRun.log_id == Logs.id)
+            .where(Logs.run_time >= since, SourceRun.error.is_(None))
+            .group_by(Logs.id, Logs.run_time, Logs.scheduled, SourceRun.source)
+        ).all(),
+        columns=[
+            "log_id",
+            "run_time",
+            "scheduled",
+            "source",
+            "rows",
+            "fetch_seconds",
+            "write_seconds",
+        ],
+    )
+    requests = pd.DataFrame(
+        session.execute(
+            select(RunSpan.log_id, RunSpan.source, RunSpan.duration_seconds)
+            .join(Logs, RunSpan.log_id == Logs.id)
+            .where(Logs.run_time >= since, RunSpan.name == "http")
+        ).all(),
+        columns=["log_id", "source", "http_seconds"],
+    )
+    http = requests.groupby(["log_id", "source"], as_index=False)["http_seconds"].median()
+    return runs.merge(http, on=["log_id", "source"], how="left").sort_values("run_time")
+
+
+def run_history(session: Session, since: datetime) -> pd.DataFrame:
+    """
+    Total runtime of every run since `since` that stored at least one source,
+    leaving out the daemon's single source runs.
+    """
+    return pd.DataFrame(
+        session.execute(
+            select(Logs.id.label("log_id"), Logs.run_time, Logs.runtime_seconds)
+            .where(
+                Logs.run_time >= since,
+                Logs.status != "FAILED",
+                Logs.scheduled.is_not(True),
+            )
+            .order_by(Logs.run_time)
+        ).all(),
+        columns=["log_id", "run_time", "runtime_seconds"],
+    )
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.orm import Session
+from database.models import IngestJob
+from webscraper.utils import DateRange
+
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+# Candidates fetched per claim attempt, so concurrent workers rarely race for the same job
+CLAIM_CANDIDATES = 5
+
+
+def _claimable(now: datetime):
+    # Running jobs whose lease ran out belong to a crashed or stuck worker
+    return or_(
+        IngestJob.status == PENDING,
+        and_(IngestJob.status == RUNNING, IngestJob.lease_until < now),
+    )
+
+
+def enqueue_jobs(session: Session, source: str, date_ranges: list[DateRange]) -> int:
+    """
+    Add one pending job per date range of `source`, skipping windows that are
+    already pending or running.
+
+    Returns:
+        Number of jobs added
+    """
+    queued = set(
+        session.execute(
+            select(IngestJob.window_start, IngestJob.window_end).where(
+                IngestJob.source == source,
+                IngestJob.status.in_([PENDING, RUNNING]),
+            )
+        ).all()
+    )
+    now = datetime.now()
+    jobs = [
+        IngestJob(source, date_range.start, date_range.end, created_at=now)
+        for date_range in date_ranges
+        if (date_range.start, date_range.end) not in queued
+    ]
+    session.add_all(jobs)
+    return len(jobs)
+
+
+def claim_job(
+    session: Session, worker: str, lease: timedelta, sources: list[str]
+) -> IngestJob | None:
+    """
+    Claim the oldest claimable job of one of `sources` for `worker`.
+
+    The claim is a conditional UPDATE that only succeeds while the job is still
+    claimable, so two workers (or hosts) sharing the database never both get
+    the same job. Jobs whose lease expired are reclaimed the same way.
+    """
+    now = datetime.now()
+    candidates = session.scalars(
+        select(IngestJob.id)
+        .where(IngestJob.source.in_(sources), _claimable(now))
+        .order_by(IngestJob.id)
+        .limit(CLAIM_CANDIDATES)
+    ).all()
+    for job_id in candidates:
+        claimed = session.execute(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, _claimable(now))
+            .values(
+                status=RUNNING,
+                worker=worker,
+                lease_until=now + lease,
+                attempts=IngestJob.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount == 1:
+            session.commit()
+            return session.get(IngestJob, job_id)
+    return None
+
+
+def renew_lease(session: Session, job_id: int, worker: str, lease: timedelta) -> bool:
+    """Extend the lease of a running job. False if `worker` no longer holds it."""
+    renewed = session.execute(
+        update(IngestJob)
+        .where(
+            IngestJob.id == job_id,
+            IngestJob.worker == worker,
+            IngestJob.status == RUNNING,
+        )
+        .values(lease_until=datetime.now() + lease)
+        .execution_options(synchronize_session=False)
+    )
+    return renewed.rowcount == 1
+
+
+def finish_job(
+    session: Session,
+    job_id: int,
+    worker: str,
+    rows: int = 0,
+    error: str | None = None,
+    max_attempts: int = 3,
+) -> bool:
+    """
+    Mark a job held by `worker` as done, or put it back in the queue after a
+    failure until it has been attempted `max_attempts` times.
+
+    Returns:
+        False if the lease was lost to another worker in the meantime
+    """
+    if error is None:
+        status = DONE
+    else:
+        status = case((IngestJob.attempts >= max_attempts, FAILED), else_=PENDING)
+    finished = session.execute(
+        update(IngestJob)
+        .where(
+            IngestJob.id == job_id,
+            IngestJob.worker == worker,
+            IngestJob.status == RUNNING,
+        )
+        .values(
+            status=status,
+            lease_until=None,
+            finished_at=datetime.now(),
+            rows=rows,
+            error=error,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return finished.rowcount == 1
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database.models import ChangeLag
+
+# Lookback used for a source without any observations yet
+DEFAULT_LOOKBACK = timedelta(days=7)
+MIN_LOOKBACK = timedelta(days=1)
+MAX_LOOKBACK = timedelta(days=30)
+# Number of most recent observations the lookback is sized from
+HISTORY_RUNS = 30
+SAFETY_FACTOR = 1.5
+# A lag this close to the lookback that was used may have been cut off by it
+EDGE_RATIO = 0.8
+
+
+def record_change_lag(
+    session: Session,
+    source: str,
+    changed_event_times: list[datetime],
+    lookback: timedelta,
+    observed_at: datetime,
+) -> ChangeLag:
+    """
+    Store how far back before `observed_at` the changed rows of a run were,
+    with the lookback the run was planned with.
+    """
+    lag = max(
+        (observed_at - event_time for event_time in changed_event_times),
+        default=timedelta(0),
+    )
+    observation = ChangeLag(
+        source=source,
+        observed_at=observed_at,
+        lag_seconds=max(lag, timedelta(0)).total_seconds(),
+        lookback_seconds=lookback.total_seconds(),
+        changed_rows=len(changed_event_times),
+    )
+    session.add(observation)
+    return observation
+
+
+def get_lookback(session: Session, source: str) -> timedelta:
+    """
+    Size the lookback of a source from its recent change lags.
+
+    The lookback covers the largest recent lag with a safety margin. When the
+    latest lag came close to the lookback that was used, older changes may have
+    been missed, so the lookback is doubled instead.
+    """
+    observations = (
+        session.execute(
+            select(ChangeLag)
+            .where(ChangeLag.source == source)
+            .order_by(ChangeLag.observed_at.desc())
+            .limit(HISTORY_RUNS)
+        )
+        .scalars()
+        .all()
+    )
+    if not observations:
+        return DEFAULT_LOOKBACK
+
+    latest = observations[0]
+    if latest.lag_seconds >= EDGE_RATIO * latest.lookback_seconds:
+        lookback = timedelta(seconds=2 * latest.lookback_seconds)
+    else:
+        largest_lag = max(observation.lag_seconds for observation in observations)
+        lookback = timedelta(seconds=SAFETY_FACTOR * largest_lag)
+    return min(MAX_LOOKBACK, max(MIN_LOOKBACK, lookback))
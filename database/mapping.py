@@ -0,0 +1,243 @@
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Callable
+import pandas as pd
+from database.models import (
+    EasyPark,
+    Giantleap,
+    ParkOne,
+    ParkPark,
+    Scanview,
+    ScanviewLog,
+    Solvision,
+)
+from webscraper.timestamps import parse_format
+
+
+class ModelRows(list):
+    """Rows of one model as dicts of column values, ready for a bulk upsert."""
+
+    def __init__(self, model: type, rows=(), quarantined=()):
+        super().__init__(rows)
+        self.model = model
+        # Quarantine column values of the fetched rows that were rejected
+        self.quarantined: list[dict] = list(quarantined)
+
+    def __add__(self, other: list) -> "ModelRows":
+        return ModelRows(
+            self.model,
+            [*self, *other],
+            [*self.quarantined, *getattr(other, "quarantined", [])],
+        )
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    Where a column's values come from: a column of the fetched DataFrame,
+    optionally converted. An optional source column may be missing, its values
+    are then None.
+    """
+
+    source: str
+    convert: Callable[[pd.Series], pd.Series] | None = None
+    optional: bool = False
+
+
+def optional(source: str, convert: Callable | None = None) -> Field:
+    return Field(source, convert, optional=True)
+
+
+def upper(values: pd.Series) -> pd.Series:
+    return values.str.upper()
+
+
+def empty_to_none(values: pd.Series) -> pd.Series:
+    return values.mask(values == "")
+
+
+def to_int(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    return pd.to_numeric(values, errors="coerce").astype("Int64")
+
+
+def timestamp(format: str, cut_at: str | None = None) -> Callable:
+    """Parse with `format`, after cutting the values at the first of `cut_at`."""
+    return partial(parse_format, format=format, cut_at=cut_at)
+
+
+# Column of each model and the field of the vendor's DataFrame it is built from
+MODEL_FIELDS: dict[type, dict[str, Field]] = {
+    Scanview: {
+        "date": Field("OrderDate"),
+        "type": Field("Name"),
+        "description": optional("Description"),
+        "subscription_name": Field("SubscriptionName"),
+        "start_date": Field("StartDate"),
+        "end_date": Field("EndDate"),
+        "status": Field("OrderStatus"),
+        "license_plate": Field("LicensePlates"),
+        "customer": Field("Customer"),
+        "location_id": Field("LocationID"),
+        "location_name": Field("LocationName"),
+        "payment_method": Field("PaymentMethod"),
+        "payment_method_name": Field("PaymentMethodName"),
+        "auto_renew": Field("AutoRenew"),
+        "price": Field("Price"),
+    },
+    ScanviewLog: {
+        "area_name": Field("AreaName"),
+        "area_id": Field("AreaNo", to_int),
+        "created_date_utc": Field("CreatedDateUtc"),
+        "end_date_utc": optional("EndDateUtc"),
+        "price": Field("Price"),
+        "license_plate": Field("LicensePlate"),
+        "payment_start_utc": optional("PaymentStartUtc"),
+        "payment_end_utc": optional("PaymentEndUtc"),
+        "handle": Field("Handle"),
+        "handle_by_type": Field("HandleByType"),
+        "handle_by": Field("HandleBy"),
+    },
+    Solvision: {
+        "location_id": Field("id"),
+        "location": Field("deviceName"),
+        "license_plate": Field("plate"),
+        "start_date": optional("start"),
+        "end_date": optional("end"),
+        "price": Field("amount"),
+        "fee": Field("fee"),
+        "parking_time": Field("parkingTime"),
+        "payment_time": Field("paymentTime"),
+        "card": Field("card"),
+        "card_firm": Field("cardFirm"),
+        "card_count": Field("cardCount"),
+        "rate_type": optional("rateType"),
+        "discount_code": optional("discountCode"),
+        "discount_type": optional("discountType"),
+    },
+    Giantleap: {
+        "report_time": Field("report_time"),
+        "description": Field("item_description"),
+        "zone": Field("zone"),
+        "payer_phone": Field("payer_msisdn"),
+        "payer_name": Field("payer"),
+        "amount": Field("amount"),
+        "vat": Field("vat"),
+        "payment_method": Field("payment_method"),
+        "payment_card": Field("payment_card"),
+        "payment_transaction": Field("payment_transaction"),
+        "note": optional("note"),
+    },
+    ParkPark: {
+        "parking_id": Field("parking_id"),
+        "external_id": optional("external_id"),
+        "name": Field("zone_name"),
+        "zone_name": optional("zone_name", empty_to_none),
+        "license_plate_country": Field("reg_cc", upper),
+        "license_plate": Field("reg", upper),
+        "checkin": Field("checkin", timestamp("%Y-%m-%d %H:%M:%S")),
+        "checkout": Field("checkout", timestamp("%Y-%m-%d %H:%M:%S")),
+        "minutes": Field("minutes"),
+        "amount": Field("amount"),
+    },
+    ParkOne: {
+        "parking_start_time": Field("parkingStartTime"),
+        "parking_stop_at": optional("parkingStopAt"),
+        "vehicle_reg_id": Field("vehicleRegId"),
+        "zone": Field("zone"),
+        "total_amount": Field("totalAmount"),
+        "parkone_parking_id": Field("parkoneParkingId"),
+        "external_parking_id": optional("externalParkingId"),
+    },
+    EasyPark: {
+        "area": Field("areaNo"),
+        "country": Field("areaCountryCode"),
+        "start_date": Field("startDate", timestamp("%Y-%m-%dT%H:%M:%S", cut_at=".+")),
+        "end_date": Field("endDate", timestamp("%Y-%m-%dT%H:%M:%S", cut_at=".+")),
+        "license_plate": Field("licenseNumber"),
+        "fee_exclusive_vat": optional("parkingFeeExclusiveVAT"),
+        "fee_inclusive_vat": optional("parkingFeeInclusiveVAT"),
+        "fee_vat": optional("parkingFeeVAT"),
+        "currency": Field("currency"),
+        "parking_id": Field("parkingId"),
+        "stopped": Field("stopped"),
+        "source": optional("sourceSystem"),
+        "subtype": optional("subType"),
+        "spot": optional("spotNumber"),
+        "area_name": Field("areaName"),
+        "external_transaction_id": optional("externalTransactionNumber"),
+    },
+}
+
+
+def map_columns(model_class: type, data: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Build the model's columns from a fetched DataFrame, one column at a time.
+
+    Returns:
+        The columns, with missing values as None, and the reasons of rows whose
+        required values could not be converted (empty for valid rows)
+    """
+    columns = {}
+    reasons = pd.Series("", index=data.index, dtype="string")
+    for column, field in MODEL_FIELDS[model_class].items():
+        if field.source not in data.columns:
+            columns[column] = [None] * len(data)
+            if not field.optional:
+                reasons = reasons + f"missing {field.source}; "
+            continue
+        values = data[field.source]
+        if field.convert is not None:
+            converted = field.convert(values)
+            if not field.optional:
+                failed = converted.isna() & values.notna()
+                reasons = reasons.mask(
+                    failed, reasons + f"could not convert {field.source}; "
+                )
+            values = converted
+        # Arrays, so a repeated index label does not confuse alignment
+        columns[column] = values.array
+
+    mapped = pd.DataFrame(columns, index=data.index)
+    mapped["content_hash"] = content_hashes(model_class, mapped)
+    mapped = mapped.astype(object)
+    return mapped.where(mapped.notna(), None), reasons.str.removesuffix("; ")
+
+
+def _hashable(values: pd.Series, python_type: type) -> pd.Series:
+    """
+    The values in one dtype per column type, so the hash does not depend on how
+    a vendor happened to send them (10 or 10.0, a categorical or strings).
+    """
+    try:
+        if python_type in (int, float):
+            return values.astype("Float64")
+        if python_type is datetime:
+            return values.astype("datetime64[us]")
+        if python_type is bool:
+            return values.astype("boolean")
+    except (TypeError, ValueError):
+        pass
+    return values.astype("string")
+
+
+def content_hashes(model_class: type, mapped: pd.DataFrame) -> pd.Series:
+    """
+    A deterministic 64-bit hash of each row's column values, stored with the
+    row so a re-fetched row can be compared with the stored one by its hash.
+    """
+    table = model_class.__table__
+    columns = {
+        column: _hashable(mapped[column], table.c[column].type.python_type)
+        for column in MODEL_FIELDS[model_class]
+    }
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(columns), index=False)
+    # SQLite integers are signed
+    return pd.Series(hashes.to_numpy().view("int64"), index=mapped.index)
+
+
+def to_rows(model_class: type, mapped: pd.DataFrame) -> ModelRows:
+    """Plain dicts of column values, one per row."""
+    return ModelRows(model_class, mapped.to_dict("records"))
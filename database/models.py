@@ -1,9 +1,7 @@
 from datetime import datetime
 from typing import Optional
-import pandas as pd
-from sqlalchemy import UniqueConstraint
-from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column
-from database.utils import safe_na_datetime
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column, relationship
 
 
 class Base(DeclarativeBase):
@@ -38,24 +36,8 @@ class Scanview(Base):
     payment_method_name: Mapped[str]
     auto_renew: Mapped[bool]
     price: Mapped[int]
-
-    def __init__(self, order: pd.Series):
-        super().__init__()
-        self.date = order.OrderDate
-        self.type = order.Name
-        self.description = order.get("Description")
-        self.subscription_name = order.SubscriptionName
-        self.start_date = order.StartDate
-        self.end_date = order.EndDate
-        self.status = order.OrderStatus
-        self.license_plate = order.LicensePlates
-        self.customer = order.Customer
-        self.location_id = order.LocationID
-        self.location_name = order.LocationName
-        self.payment_method = order.PaymentMethod
-        self.payment_method_name = order.PaymentMethodName
-        self.auto_renew = order.AutoRenew
-        self.price = order.Price
+    # Hash of the other columns, see database.mapping.content_hashes
+    content_hash: Mapped[Optional[int]]
 
 
 class ScanviewLog(Base):
@@ -72,7 +54,7 @@ class ScanviewLog(Base):
     id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
     area_name: Mapped[str]
     area_id: Mapped[int]
-    created_date_utc: Mapped[datetime]
+    created_date_utc: Mapped[datetime] = mapped_column(index=True)
     end_date_utc: Mapped[Optional[datetime]]
     price: Mapped[int]
     license_plate: Mapped[str]
@@ -81,21 +63,7 @@ class ScanviewLog(Base):
     handle: Mapped[bool]
     handle_by_type: Mapped[str]
     handle_by: Mapped[str]
-
-    def __init__(self, log: pd.Series):
-        super().__init__()
-        log = safe_na_datetime(log)
-        self.area_name = log.AreaName
-        self.area_id = int(log.AreaNo)
-        self.created_date_utc = log.CreatedDateUtc
-        self.end_date_utc = log.get("EndDateUtc")
-        self.price = log.Price
-        self.license_plate = log.LicensePlate
-        self.payment_start_utc = log.get("PaymentStartUtc")
-        self.payment_end_utc = log.get("PaymentEndUtc")
-        self.handle = log.Handle
-        self.handle_by_type = log.HandleByType
-        self.handle_by = log.HandleBy
+    content_hash: Mapped[Optional[int]]
 
 
 class Solvision(Base):
@@ -118,32 +86,14 @@ class Solvision(Base):
     price: Mapped[float]
     fee: Mapped[int]
     parking_time: Mapped[int]
-    payment_time: Mapped[datetime]
+    payment_time: Mapped[datetime] = mapped_column(index=True)
     license_plate: Mapped[str]
     start_date: Mapped[Optional[datetime]]
     end_date: Mapped[Optional[datetime]]
     rate_type: Mapped[Optional[str]]
     discount_code: Mapped[Optional[str]]
     discount_type: Mapped[Optional[str]]
-
-    def __init__(self, order: pd.Series):
-        super().__init__()
-        order = safe_na_datetime(order)
-        self.location_id = order.id
-        self.location = order.deviceName
-        self.license_plate = order.plate
-        self.start_date = order.get("start")
-        self.end_date = order.get("end")
-        self.price = order.amount
-        self.fee = order.fee
-        self.parking_time = order.parkingTime
-        self.payment_time = order.paymentTime
-        self.card = order.card
-        self.card_firm = order.cardFirm
-        self.card_count = order.cardCount
-        self.rate_type = order.get("rateType")
-        self.discount_code = order.get("discountCode")
-        self.discount_type = order.get("discountType")
+    content_hash: Mapped[Optional[int]]
 
 
 class Giantleap(Base):
@@ -153,7 +103,7 @@ class Giantleap(Base):
     )
 
     id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
-    report_time: Mapped[datetime]
+    report_time: Mapped[datetime] = mapped_column(index=True)
     description: Mapped[str]
     zone: Mapped[str]
     payer_phone: Mapped[str]
@@ -164,20 +114,7 @@ class Giantleap(Base):
     payment_card: Mapped[str]
     payment_transaction: Mapped[int]
     note: Mapped[Optional[str]]
-
-    def __init__(self, order: pd.Series):
-        super().__init__()
-        self.report_time = order.report_time
-        self.description = order.item_description
-        self.zone = order.zone
-        self.payer_phone = order.payer_msisdn
-        self.payer_name = order.payer
-        self.amount = order.amount
-        self.vat = order.vat
-        self.payment_method = order.payment_method
-        self.payment_card = order.payment_card
-        self.payment_transaction = order.payment_transaction
-        self.note = order.get("note")
+    content_hash: Mapped[Optional[int]]
 
 
 class ParkPark(Base):
@@ -191,24 +128,11 @@ class ParkPark(Base):
     name: Mapped[str]
     license_plate_country: Mapped[str]
     license_plate: Mapped[str]
-    checkin: Mapped[datetime]
+    checkin: Mapped[datetime] = mapped_column(index=True)
     checkout: Mapped[datetime]
     minutes: Mapped[int]
     amount: Mapped[int]
-
-    def __init__(self, parking: pd.Series):
-        super().__init__()
-        self.parking_id = parking.parking_id
-        self.external_id = parking.get("external_id")
-        self.name = parking.zone_name
-        zone_name = parking.get("zone_name")
-        self.zone_name = None if zone_name == "" else zone_name
-        self.license_plate_country = parking.reg_cc.upper()
-        self.license_plate = parking.reg.upper()
-        self.checkin = datetime.strptime(parking.checkin, "%Y-%m-%d %H:%M:%S")
-        self.checkout = datetime.strptime(parking.checkout, "%Y-%m-%d %H:%M:%S")
-        self.minutes = parking.minutes
-        self.amount = parking.amount
+    content_hash: Mapped[Optional[int]]
 
 
 class ParkOne(Base):
@@ -220,21 +144,12 @@ class ParkOne(Base):
     id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
     parkone_parking_id: Mapped[int]
     external_parking_id: Mapped[Optional[str]]
-    parking_start_time: Mapped[datetime]
+    parking_start_time: Mapped[datetime] = mapped_column(index=True)
     parking_stop_at: Mapped[Optional[datetime]]
     vehicle_reg_id: Mapped[str]
     zone: Mapped[str]
     total_amount: Mapped[float]
-
-    def __init__(self, parking: pd.Series):
-        super().__init__()
-        self.parking_start_time = parking.parkingStartTime
-        self.parking_stop_at = parking.get("parkingStopAt")
-        self.vehicle_reg_id = parking.vehicleRegId
-        self.zone = parking.zone
-        self.total_amount = parking.totalAmount
-        self.parkone_parking_id = parking.parkoneParkingId
-        self.external_parking_id = parking.get("externalParkingId")
+    content_hash: Mapped[Optional[int]]
 
 
 class EasyPark(Base):
@@ -244,7 +159,7 @@ class EasyPark(Base):
     id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
     area: Mapped[int]
     country: Mapped[str]
-    start_date: Mapped[datetime]
+    start_date: Mapped[datetime] = mapped_column(index=True)
     end_date: Mapped[datetime]
     license_plate: Mapped[str]
     fee_exclusive_vat: Mapped[Optional[float]]
@@ -258,31 +173,7 @@ class EasyPark(Base):
     spot: Mapped[Optional[str]]
     area_name: Mapped[str]
     external_transaction_id: Mapped[Optional[str]]
-
-    def __init__(self, parking: pd.Series):
-        super().__init__()
-        # Preprocess datetimes
-        parking = safe_na_datetime(parking)
-        parking["startDate"] = parking["startDate"].split(".")[0].split("+")[0]
-        parking["endDate"] = parking["endDate"].split(".")[0].split("+")[0]
-
-        # Assign values
-        self.area = parking["areaNo"]
-        self.country = parking["areaCountryCode"]
-        self.start_date = datetime.strptime(parking["startDate"], "%Y-%m-%dT%H:%M:%S")
-        self.end_date = datetime.strptime(parking["endDate"], "%Y-%m-%dT%H:%M:%S")
-        self.license_plate = parking["licenseNumber"]
-        self.fee_exclusive_vat = parking.get("parkingFeeExclusiveVAT")
-        self.fee_inclusive_vat = parking.get("parkingFeeInclusiveVAT")
-        self.fee_vat = parking.get("parkingFeeVAT")
-        self.currency = parking["currency"]
-        self.parking_id = parking["parkingId"]
-        self.stopped = parking["stopped"]
-        self.source = parking.get("sourceSystem")
-        self.subtype = parking.get("subType")
-        self.spot = parking.get("spotNumber")
-        self.area_name = parking["areaName"]
-        self.external_transaction_id = parking.get("externalTransactionNumber")
+    content_hash: Mapped[Optional[int]]
 
 
 class Logs(Base):
@@ -302,6 +193,10 @@ class Logs(Base):
     status: Mapped[str]
     message: Mapped[str]
     runtime_seconds: Mapped[float]
+    # Set for the daemon's runs of a single source on its cadence
+    scheduled: Mapped[Optional[bool]]
+    source_runs: Mapped[list["SourceRun"]] = relationship(back_populates="log")
+    spans: Mapped[list["RunSpan"]] = relationship(back_populates="log")
 
     def __init__(
         self,
@@ -318,6 +213,7 @@ class Logs(Base):
         status: str,
         message: str,
         runtime_seconds: float,
+        scheduled: bool = False,
     ):
         super().__init__()
         self.run_time = run_time
@@ -333,3 +229,235 @@ class Logs(Base):
         self.status = status
         self.message = message
         self.runtime_seconds = runtime_seconds
+        self.scheduled = scheduled
+
+
+class SourceRun(Base):
+    """Fetch and write timings of one table of a source within a run."""
+
+    __tablename__ = "source_runs"
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    log_id: Mapped[Optional[int]] = mapped_column(ForeignKey("logs.id"))
+    source: Mapped[str]
+    table_name: Mapped[Optional[str]]
+    rows: Mapped[int]
+    fetch_seconds: Mapped[float]
+    write_seconds: Mapped[Optional[float]]
+    error: Mapped[Optional[str]]
+    # What the upsert did with the rows
+    inserted: Mapped[Optional[int]]
+    updated: Mapped[Optional[int]]
+    unchanged: Mapped[Optional[int]]
+    log: Mapped[Optional[Logs]] = relationship(back_populates="source_runs")
+
+    def __init__(
+        self,
+        source: str,
+        table_name: str | None,
+        rows: int,
+        fetch_seconds: float,
+        write_seconds: float | None = None,
+        error: str | None = None,
+        inserted: int | None = None,
+        updated: int | None = None,
+        unchanged: int | None = None,
+    ):
+        super().__init__()
+        self.source = source
+        self.table_name = table_name
+        self.rows = rows
+        self.fetch_seconds = fetch_seconds
+        self.write_seconds = write_seconds
+        self.error = error
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+
+
+class Watermark(Base):
+    """Latest timestamp up to which a source has been fully ingested."""
+
+    __tablename__ = "watermarks"
+
+    source: Mapped[str] = mapped_column(primary_key=True)
+    ingested_until: Mapped[datetime]
+    updated_at: Mapped[datetime]
+
+    def __init__(self, source: str, ingested_until: datetime, updated_at: datetime):
+        super().__init__()
+        self.source = source
+        self.ingested_until = ingested_until
+        self.updated_at = updated_at
+
+
+class ChangeLag(Base):
+    """How far back in time a run found changes to already stored rows of a source."""
+
+    __tablename__ = "change_lags"
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    source: Mapped[str] = mapped_column(index=True)
+    observed_at: Mapped[datetime]
+    lag_seconds: Mapped[float]
+    lookback_seconds: Mapped[float]
+    changed_rows: Mapped[int]
+
+    def __init__(
+        self,
+        source: str,
+        observed_at: datetime,
+        lag_seconds: float,
+        lookback_seconds: float,
+        changed_rows: int,
+    ):
+        super().__init__()
+        self.source = source
+        self.observed_at = observed_at
+        self.lag_seconds = lag_seconds
+        self.lookback_seconds = lookback_seconds
+        self.changed_rows = changed_rows
+
+
+class RunSpan(Base):
+    """Duration, rows and bytes of one traced stage of a run."""
+
+    __tablename__ = "run_spans"
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    log_id: Mapped[Optional[int]] = mapped_column(ForeignKey("logs.id"), index=True)
+    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey("run_spans.id"))
+    source: Mapped[Optional[str]]
+    name: Mapped[str]
+    started_at: Mapped[datetime]
+    duration_seconds: Mapped[float]
+    rows: Mapped[Optional[int]]
+    bytes: Mapped[Optional[int]]
+    log: Mapped[Optional[Logs]] = relationship(back_populates="spans")
+    parent: Mapped[Optional["RunSpan"]] = relationship(remote_side=[id])
+
+    def __init__(
+        self,
+        source: str | None,
+        name: str,
+        started_at: datetime,
+        duration_seconds: float,
+        rows: int | None = None,
+        bytes: int | None = None,
+    ):
+        super().__init__()
+        self.source = source
+        self.name = name
+        self.started_at = started_at
+        self.duration_seconds = duration_seconds
+        self.rows = rows
+        self.bytes = bytes
+
+
+class FetchWindow(Base):
+    """Ledger entry of one date window fetched from a source, used to plan re-fetches."""
+
+    __tablename__ = "fetch_windows"
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    source: Mapped[str] = mapped_column(index=True)
+    window_start: Mapped[datetime]
+    window_end: Mapped[datetime]
+    status: Mapped[str]
+    row_count: Mapped[Optional[int]]
+    fetched_at: Mapped[datetime]
+
+    def __init__(
+        self,
+        source: str,
+        window_start: datetime,
+        window_end: datetime,
+        status: str,
+        row_count: int | None,
+        fetched_at: datetime,
+    ):
+        super().__init__()
+        self.source = source
+        self.window_start = window_start
+        self.window_end = window_end
+        self.status = status
+        self.row_count = row_count
+        self.fetched_at = fetched_at
+
+
+class IngestJob(Base):
+    """A (source, window) unit of work, claimed by worker processes under a lease."""
+
+    __tablename__ = "ingest_jobs"
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    source: Mapped[str]
+    window_start: Mapped[datetime]
+    window_end: Mapped[datetime]
+    status: Mapped[str] = mapped_column(index=True)
+    attempts: Mapped[int]
+    worker: Mapped[Optional[str]]
+    lease_until: Mapped[Optional[datetime]]
+    created_at: Mapped[datetime]
+    finished_at: Mapped[Optional[datetime]]
+    rows: Mapped[Optional[int]]
+    error: Mapped[Optional[str]]
+
+    def __init__(
+        self,
+        source: str,
+        window_start: datetime,
+        window_end: datetime,
+        created_at: datetime,
+    ):
+        super().__init__()
+        self.source = source
+        self.window_start = window_start
+        self.window_end = window_end
+        self.status = "PENDING"
+        self.attempts = 0
+        self.created_at = created_at
+
+
+class Quarantine(Base):
+    """A fetched row that failed validation, kept as fetched for inspection."""
+
+    __tablename__ = "quarantine"
+    # A unique index rather than a constraint, upgrade_tables adds it to
+    # existing databases
+    __table_args__ = (
+        Index("uq_quarantine_row", "table_name", "row_hash", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(autoincrement=True, primary_key=True)
+    table_name: Mapped[str] = mapped_column(index=True)
+    reason: Mapped[str]
+    payload: Mapped[str]
+    quarantined_at: Mapped[datetime]
+    # Hash of the payload, a row rejected again by a later fetch is updated
+    row_hash: Mapped[Optional[int]]
+
+    def __init__(
+        self,
+        table_name: str,
+        reason: str,
+        payload: str,
+        quarantined_at: datetime,
+        row_hash: int | None = None,
+    ):
+        super().__init__()
+        self.table_name = table_name
+        self.reason = reason
+        self.payload = payload
+        self.quarantined_at = quarantined_at
+        self.row_hash = row_hash
+
+
+class SchemaVersion(Base):
+    """Fingerprint of the table definitions the database was last created with."""
+
+    __tablename__ = "schema_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[str]
+    updated_at: Mapped[datetime]
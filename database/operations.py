@@ -1,41 +1,127 @@
 # db.py
-from sqlalchemy import create_engine
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import cache
+import hashlib
+from sqlalchemy import (
+    Engine,
+    create_engine,
+    insert,
+    inspect,
+    or_,
+    select,
+    text,
+    tuple_,
+)
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, Session
 import os
 from dotenv import load_dotenv
+import pandas as pd
 from database.models import (
     Base,
     EasyPark,
     Giantleap,
     ParkOne,
     ParkPark,
+    Quarantine,
     Scanview,
     ScanviewLog,
+    SchemaVersion,
     Solvision,
 )
 
-# Load environment variables
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL not set")
-
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Useful for debugging
-    pool_size=5,  # Smaller pool for scripts
-    max_overflow=0,
-    future=True,
-)
 
-# Create session factory
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def schema_version() -> str:
+    """Fingerprint of the tables, columns, types and indexes defined in the models."""
+    definition = sorted(
+        [
+            f"{table.name}.{column.name}:{column.type}:{column.nullable}"
+            for table in Base.metadata.sorted_tables
+            for column in table.columns
+        ]
+        + [
+            f"{table.name}:{index.name}"
+            for table in Base.metadata.sorted_tables
+            for index in table.indexes
+        ]
+    )
+    return hashlib.sha256("\n".join(definition).encode()).hexdigest()[:16]
+
+
+def upgrade_tables(engine: Engine) -> None:
+    """
+    Add nullable columns and indexes the models gained to tables created before
+    them. A new column that is not nullable cannot be added to a filled table,
+    it raises a RuntimeError, so the schema version is not stored and the
+    mismatch shows up on every start until the table is migrated by hand.
+    """
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in existing]
+            required = [column.name for column in missing if not column.nullable]
+            if required:
+                raise RuntimeError(
+                    f"Cannot add the required column(s) {', '.join(required)} "
+                    f"to table {table.name}"
+                )
+            for column in missing:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(
+                        f'ALTER TABLE "{table.name}" '
+                        f'ADD COLUMN "{column.name}" {column_type}'
+                    )
+                )
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Create missing tables, columns and indexes, unless the database was already created
+    with the current models. Checking the stored version is one query, where
+    create_all inspects every table.
+    """
+    version = schema_version()
+    with engine.connect() as conn:
+        if inspect(conn).has_table(SchemaVersion.__tablename__):
+            stored = conn.scalar(select(SchemaVersion.version))
+            if stored == version:
+                return
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_tables(engine)
+    with Session(engine) as session:
+        session.merge(SchemaVersion(id=1, version=version, updated_at=datetime.now()))
+        session.commit()
+
+
+@cache
+def get_engine() -> Engine:
+    """The engine, created and checked against the models on first use."""
+    # Load environment variables
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL not set")
+
+    engine = create_engine(
+        database_url,
+        echo=False,  # Useful for debugging
+        pool_size=5,  # Smaller pool for scripts
+        max_overflow=0,
+        future=True,
+    )
+    ensure_schema(engine)
+    return engine
 
 
-# Optional: schema creation script
-Base.metadata.create_all(bind=engine)
+@cache
+def session_factory() -> sessionmaker:
+    return sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
 
 
 # Context manager for DB session
@@ -44,7 +130,7 @@ from contextlib import contextmanager
 
 @contextmanager
 def get_db():
-    db = SessionLocal()
+    db = session_factory()()
     try:
         yield db
         db.commit()
@@ -64,50 +150,269 @@ MODEL_INDEX_ELEMENTS: dict[type, list[str]] = {
     ParkPark: ["parking_id"],
     ParkOne: ["parkone_parking_id"],
     EasyPark: ["parking_id"],
+    Quarantine: ["table_name", "row_hash"],
 }
 
+# Mapping of model classes to the column holding the time of the event a row describes
+MODEL_EVENT_TIME: dict[type, str] = {
+    Scanview: "date",
+    ScanviewLog: "created_date_utc",
+    Solvision: "payment_time",
+    Giantleap: "report_time",
+    ParkPark: "checkin",
+    ParkOne: "parking_start_time",
+    EasyPark: "start_date",
+}
+
+
+def record_values(record, columns: list[str]) -> dict:
+    """Column values of an ORM instance or of a dict of column values."""
+    if isinstance(record, dict):
+        return {col: record.get(col) for col in columns}
+    return {col: getattr(record, col) for col in columns}
+
 
-def upsert_records(session: Session, records: list) -> int:
+# Rows sent per executemany call of an upsert
+UPSERT_BATCH_SIZE = 5_000
+
+
+def set_upsert_batch_size(batch_size: int) -> None:
+    global UPSERT_BATCH_SIZE
+    UPSERT_BATCH_SIZE = max(1, batch_size)
+
+
+@dataclass
+class UpsertCounts:
+    """What an upsert did with its rows."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def rows(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+
+@cache
+def upsert_statement(model_class: type):
+    """
+    The INSERT ... ON CONFLICT DO UPDATE of a model, built once and executed
+    with the values of many rows. A stored row is only updated when one of its
+    columns differs, so unchanged rows cost no write.
     """
-    Upsert a list of ORM model instances using SQLite's ON CONFLICT DO UPDATE.
+    index_elements = MODEL_INDEX_ELEMENTS[model_class]
+    table = model_class.__table__
+    update_columns = [
+        c.name for c in table.columns if c.name != "id" and c.name not in index_elements
+    ]
+    stmt = sqlite_insert(model_class)
+    # On conflict, update all non-key columns
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: stmt.excluded[col] for col in update_columns},
+        where=or_(
+            *(table.c[col].is_distinct_from(stmt.excluded[col]) for col in update_columns)
+        ),
+    )
+
+
+def upsert_records(
+    session: Session,
+    records: list,
+    model_class: type | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """
+    Upsert rows using SQLite's ON CONFLICT DO UPDATE, sent in batches through
+    executemany. Stored rows whose values are all the same are left untouched.
 
     Args:
         session: SQLAlchemy session
-        records: List of ORM model instances (must all be the same type)
+        records: ORM model instances, or dicts of column values, all of one model
+        model_class: Model of the rows, required for dicts
+        batch_size: Rows per executemany call (default: UPSERT_BATCH_SIZE)
 
     Returns:
         Number of records processed
     """
+    _write_records(session, records, model_class, batch_size)
+    return len(records)
+
+
+def _write_records(
+    session: Session,
+    records: list,
+    model_class: type | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """upsert_records, returning the number of rows inserted or updated."""
     if not records:
         return 0
 
     # Get the model class from the first record
-    model_class = type(records[0])
-
-    # Get index elements for this model
-    index_elements = MODEL_INDEX_ELEMENTS.get(model_class)
-    if not index_elements:
-        # Fallback to regular add_all for models without upsert config (e.g., Logs)
-        session.add_all(records)
-        return len(records)
+    model_class = model_class or type(records[0])
+    batch_size = batch_size or UPSERT_BATCH_SIZE
 
     # Get all column names except 'id' (auto-increment primary key)
     columns = [c.name for c in model_class.__table__.columns if c.name != "id"]
 
-    for record in records:
-        # Convert ORM object to dictionary
-        values = {col: getattr(record, col) for col in columns}
+    if not MODEL_INDEX_ELEMENTS.get(model_class):
+        # Fallback to plain inserts for models without upsert config (e.g., Logs)
+        if isinstance(records[0], dict):
+            session.execute(
+                insert(model_class), [record_values(r, columns) for r in records]
+            )
+        else:
+            session.add_all(records)
+        return len(records)
+
+    stmt = upsert_statement(model_class)
+    connection = session.connection()
+    written = 0
+    for start in range(0, len(records), batch_size):
+        # Every row carries every column, so all rows fit the one statement
+        batch = [record_values(r, columns) for r in records[start : start + batch_size]]
+        # SQLite counts inserted and updated rows, not the skipped no-op updates.
+        # Drivers that cannot count executemany rows report -1.
+        rowcount = connection.execute(stmt, batch).rowcount
+        written += rowcount if rowcount >= 0 else len(batch)
+    return written
+
+
+def _normalize(value):
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    if isinstance(value, datetime):
+        # SQLite stores the wall time of aware datetimes without their offset
+        return value.replace(tzinfo=None)
+    return None if pd.isna(value) else value
+
+
+# Business keys looked up per query, below SQLite's limit of bound parameters
+KEY_LOOKUP_BATCH = 500
+
 
-        # Build upsert statement
-        stmt = sqlite_insert(model_class).values(**values)
+@dataclass
+class RowDiff:
+    """How fetched rows compare with the rows stored for the same business keys."""
 
-        # On conflict, update all non-key columns
-        update_columns = [col for col in columns if col not in index_elements]
-        stmt = stmt.on_conflict_do_update(
-            index_elements=index_elements,
-            set_={col: stmt.excluded[col] for col in update_columns},
+    # Rows without a stored row
+    new: list = field(default_factory=list)
+    # Rows whose hash differs from the stored one, or whose stored hash is not known
+    changed: list = field(default_factory=list)
+    unchanged: int = 0
+    # Event times of the rows whose hash differs from a stored hash
+    changed_event_times: list[datetime] = field(default_factory=list)
+
+    @property
+    def matched(self) -> int:
+        return len(self.changed) + self.unchanged
+
+
+def _stored_hashes(
+    session: Session,
+    model_class: type,
+    incoming: list[tuple],
+    index_elements: list[str],
+    event_column: str | None,
+) -> dict[tuple, int | None]:
+    """
+    The stored hash of each incoming business key that has a stored row. The
+    rows of the fetched window, from its first to its last event time, are
+    loaded in one range query on the indexed event time column. Keys outside
+    it, e.g. of rows whose event time changed, are then looked up by key.
+    """
+    table = model_class.__table__
+    key_columns = [table.c[col] for col in index_elements]
+    columns = [*key_columns, table.c.content_hash]
+
+    def load(stmt) -> dict[tuple, int | None]:
+        return {
+            tuple(_normalize(value) for value in row[:-1]): row[-1]
+            for row in session.execute(stmt)
+        }
+
+    stored = {}
+    event_times = [event_time for _, event_time, _ in incoming if event_time]
+    if event_column and event_times:
+        stored = load(
+            select(*columns).where(
+                table.c[event_column].between(min(event_times), max(event_times))
+            )
         )
+    missing = list(dict.fromkeys(key for key, _, _ in incoming if key not in stored))
+    for start in range(0, len(missing), KEY_LOOKUP_BATCH):
+        keys = missing[start : start + KEY_LOOKUP_BATCH]
+        if len(key_columns) == 1:
+            condition = key_columns[0].in_([key[0] for key in keys])
+        else:
+            condition = tuple_(*key_columns).in_(keys)
+        stored.update(load(select(*columns).where(condition)))
+    return stored
 
-        session.execute(stmt)
 
-    return len(records)
+def diff_rows(
+    session: Session, records: list, model_class: type | None = None
+) -> RowDiff:
+    """
+    Compare records with the stored rows of the same business keys by their
+    content hash.
+
+    Args:
+        session: SQLAlchemy session
+        records: ORM model instances, or dicts of column values, all of one model
+        model_class: Model of the rows, required for dicts
+
+    Returns:
+        The new and the changed records, and how many are unchanged
+    """
+    if not records:
+        return RowDiff()
+
+    model_class = model_class or type(records[0])
+    index_elements = MODEL_INDEX_ELEMENTS.get(model_class)
+    if not index_elements:
+        return RowDiff(new=list(records))
+
+    event_column = MODEL_EVENT_TIME.get(model_class)
+    columns = [*index_elements, "content_hash", *([event_column] if event_column else [])]
+    incoming = []
+    for record in records:
+        values = {
+            col: _normalize(value)
+            for col, value in record_values(record, columns).items()
+        }
+        key = tuple(values[col] for col in index_elements)
+        event_time = values[event_column] if event_column else None
+        incoming.append((key, event_time, values["content_hash"]))
+    stored = _stored_hashes(session, model_class, incoming, index_elements, event_column)
+
+    diff = RowDiff()
+    for record, (key, event_time, content_hash) in zip(records, incoming):
+        if key not in stored:
+            diff.new.append(record)
+            continue
+        stored_hash = stored[key]
+        if stored_hash is not None and stored_hash == content_hash:
+            diff.unchanged += 1
+            continue
+        diff.changed.append(record)
+        # Rows stored before they had a hash are rewritten, not counted as changes
+        if stored_hash is not None and event_time is not None:
+            diff.changed_event_times.append(event_time)
+    return diff
+
+
+def upsert_diff(session: Session, diff: RowDiff, model_class: type) -> UpsertCounts:
+    """
+    Upsert the new and the changed records of a diff. Inserted rows are the
+    new ones written, updated rows the changed ones written.
+    """
+    inserted = _write_records(session, diff.new, model_class)
+    updated = _write_records(session, diff.changed, model_class)
+    return UpsertCounts(
+        inserted=inserted,
+        updated=updated,
+        unchanged=diff.unchanged + len(diff.new) + len(diff.changed) - inserted - updated,
+    )
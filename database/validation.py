@@ -0,0 +1,219 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+import pandas as pd
+from database.mapping import timestamp as parse_timestamp
+from database.models import (
+    EasyPark,
+    Giantleap,
+    ParkOne,
+    ParkPark,
+    Scanview,
+    ScanviewLog,
+    Solvision,
+)
+from database.utils import safe_na_datetime
+
+
+@dataclass(frozen=True)
+class Check:
+    """A rule rows must follow, `invalid` marks the rows breaking it."""
+
+    reason: str
+    invalid: Callable[[pd.DataFrame], pd.Series]
+
+
+def _column(data: pd.DataFrame, column: str) -> pd.Series | None:
+    return data[column] if column in data.columns else None
+
+
+def required(*columns: str) -> list[Check]:
+    """The columns must be present and not empty."""
+
+    def check(column: str) -> Check:
+        def invalid(data: pd.DataFrame) -> pd.Series:
+            values = _column(data, column)
+            if values is None:
+                return pd.Series(True, index=data.index)
+            return values.isna()
+
+        return Check(f"missing {column}", invalid)
+
+    return [check(column) for column in columns]
+
+
+def integer(column: str) -> Check:
+    """The column, where set, must hold whole numbers."""
+
+    def invalid(data: pd.DataFrame) -> pd.Series:
+        values = _column(data, column)
+        if values is None:
+            return pd.Series(False, index=data.index)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        numbers = pd.to_numeric(values, errors="coerce")
+        return values.notna() & (numbers.isna() | (numbers % 1 != 0))
+
+    return Check(f"{column} is not an integer", invalid)
+
+
+def timestamp(column: str, format: str, cut_at: str | None = None) -> Check:
+    """
+    The column, where set, must parse with `format`, after cutting each value
+    at the first of the characters in `cut_at` as the model does.
+    """
+
+    def invalid(data: pd.DataFrame) -> pd.Series:
+        values = _column(data, column)
+        if values is None:
+            return pd.Series(False, index=data.index)
+        return values.notna() & parse_timestamp(format, cut_at)(values).isna()
+
+    return Check(f"{column} is not a {format} timestamp", invalid)
+
+
+# What mapping each model's fields relies on, checked for all rows at once
+MODEL_CHECKS: dict[type, list[Check]] = {
+    Scanview: required(
+        "OrderDate",
+        "Name",
+        "SubscriptionName",
+        "StartDate",
+        "EndDate",
+        "OrderStatus",
+        "LicensePlates",
+        "Customer",
+        "LocationID",
+        "LocationName",
+        "PaymentMethod",
+        "PaymentMethodName",
+        "AutoRenew",
+        "Price",
+    ),
+    ScanviewLog: [
+        *required(
+            "AreaName",
+            "AreaNo",
+            "CreatedDateUtc",
+            "Price",
+            "LicensePlate",
+            "Handle",
+            "HandleByType",
+            "HandleBy",
+        ),
+        integer("AreaNo"),
+    ],
+    Solvision: [
+        *required(
+            "id",
+            "deviceName",
+            "plate",
+            "amount",
+            "fee",
+            "parkingTime",
+            "paymentTime",
+            "card",
+            "cardFirm",
+            "cardCount",
+        ),
+        integer("id"),
+    ],
+    Giantleap: [
+        *required(
+            "report_time",
+            "item_description",
+            "zone",
+            "payer_msisdn",
+            "payer",
+            "amount",
+            "vat",
+            "payment_method",
+            "payment_card",
+            "payment_transaction",
+        ),
+        integer("payment_transaction"),
+    ],
+    ParkPark: [
+        *required(
+            "parking_id",
+            "zone_name",
+            "reg_cc",
+            "reg",
+            "checkin",
+            "checkout",
+            "minutes",
+            "amount",
+        ),
+        timestamp("checkin", "%Y-%m-%d %H:%M:%S"),
+        timestamp("checkout", "%Y-%m-%d %H:%M:%S"),
+        integer("parking_id"),
+    ],
+    ParkOne: [
+        *required(
+            "parkingStartTime", "vehicleRegId", "zone", "totalAmount", "parkoneParkingId"
+        ),
+        integer("parkoneParkingId"),
+    ],
+    EasyPark: [
+        *required(
+            "areaNo",
+            "areaCountryCode",
+            "startDate",
+            "endDate",
+            "licenseNumber",
+            "currency",
+            "parkingId",
+            "stopped",
+            "areaName",
+        ),
+        timestamp("startDate", "%Y-%m-%dT%H:%M:%S", cut_at=".+"),
+        timestamp("endDate", "%Y-%m-%dT%H:%M:%S", cut_at=".+"),
+        integer("parkingId"),
+    ],
+}
+
+
+def validate(
+    model_class: type, data: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series]:
+    """
+    Split fetched rows into the ones a model can be built from and the rest.
+
+    Returns:
+        The valid rows, the invalid rows and the reasons of the invalid rows
+    """
+    reasons = pd.Series("", index=data.index, dtype="string")
+    for check in MODEL_CHECKS.get(model_class, []):
+        invalid = check.invalid(data).fillna(True).astype(bool)
+        reasons = reasons.mask(invalid, reasons + check.reason + "; ")
+    rejected = reasons != ""
+    return data[~rejected], data[rejected], reasons[rejected].str.removesuffix("; ")
+
+
+def quarantine_records(
+    model_class: type, rows: pd.DataFrame, reasons: pd.Series
+) -> list[dict]:
+    """
+    Rejected rows as they were fetched, with the reason they were rejected, as
+    Quarantine column values. Rows are keyed by a hash of their payload, so a
+    row rejected on every refetch is stored once.
+    """
+    payloads = [
+        json.dumps(safe_na_datetime(row).to_dict(), default=str)
+        for _, row in rows.iterrows()
+    ]
+    row_hashes = pd.util.hash_pandas_object(
+        pd.Series(payloads, dtype=object), index=False
+    ).astype("int64")
+    quarantined_at = datetime.now()
+    return [
+        {
+            "table_name": model_class.__tablename__,
+            "reason": reason,
+            "payload": payload,
+            "quarantined_at": quarantined_at,
+            "row_hash": int(row_hash),
+        }
+        for payload, row_hash, reason in zip(payloads, row_hashes, reasons)
+    ]
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from database.models import Watermark
+
+
+def get_watermark(session: Session, source: str) -> datetime | None:
+    """Return the timestamp up to which `source` has been ingested (primary key lookup)."""
+    watermark = session.get(Watermark, source)
+    return watermark.ingested_until if watermark else None
+
+
+def set_watermark(session: Session, source: str, ingested_until: datetime) -> None:
+    """Advance the watermark of `source`. A watermark is never moved backwards."""
+    watermark = session.get(Watermark, source)
+    if watermark is None:
+        session.add(Watermark(source, ingested_until, updated_at=datetime.now()))
+    elif ingested_until > watermark.ingested_until:
+        watermark.ingested_until = ingested_until
+        watermark.updated_at = datetime.now()
@@ -0,0 +1,193 @@
+import contextvars
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+import database.operations as db_ops
+from database.coverage import record_windows
+from database.lookback import get_lookback, record_change_lag
+from database.models import Quarantine, SourceRun
+from database.watermarks import set_watermark
+from tracing import span
+from webscraper.utils import DateRange
+from webscraper.window_log import WindowResult
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """
+    Background writer that upserts each source as soon as it has been fetched.
+
+    Sources are handed over through a bounded queue, so fetching is throttled
+    when the database falls behind instead of piling up ORM objects in memory.
+    Every source is written and committed in its own transaction, so a failing
+    upsert only rolls back that source.
+    """
+
+    def __init__(self, max_pending: int = 2, profiler=None):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.source_runs: list[SourceRun] = []
+        # Optional profiling.Profiler, each source's write becomes a stage
+        self.profiler = profiler
+
+    def start(self) -> "DatabaseWriter":
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._run,),
+            name="db-writer",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def submit(
+        self,
+        source: str,
+        tables: list[list],
+        fetch_seconds: float,
+        date_range: DateRange | None = None,
+        windows: list[WindowResult] | None = None,
+        lookback: timedelta | None = None,
+    ) -> None:
+        """
+        Queue the tables of a source for writing. Blocks while the queue is full.
+
+        When the fetched `date_range` is given, the source's watermark is advanced
+        up to its first failed window and the age of changed rows is recorded
+        against the `lookback` the fetch was planned with. The fetched `windows`
+        are added to the coverage ledger, all in the same transaction as the
+        records. A window therefore only counts as fetched once its rows are
+        stored.
+        """
+        self._queue.put((source, tables, fetch_seconds, date_range, windows, lookback))
+
+    def flush(self) -> None:
+        """Wait until every queued source has been written."""
+        self._queue.join()
+
+    def close(self) -> list[SourceRun]:
+        """Wait for all queued sources to be written and return their timings."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        return self.source_runs
+
+    def failed_sources(self) -> set[str]:
+        return {run.source for run in self.source_runs if run.error}
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            source, _, fetch_seconds, _, _, _ = item
+            runs: list[SourceRun] | None = None
+            try:
+                profile = (
+                    self.profiler.profile(f"{source}_upsert")
+                    if self.profiler
+                    else nullcontext()
+                )
+                with profile:
+                    runs = self._write(*item)
+            except Exception as e:
+                # Failures around the write, such as writing its profile, must
+                # not stop the writer. The source only failed when it was not
+                # written, _write reports failures of its transaction itself.
+                if runs is None:
+                    runs = [self._failed(source, fetch_seconds, e)]
+                else:
+                    print(f"Error after storing {source} data: {e}")
+            finally:
+                self.source_runs.extend(runs or [])
+                # Without it flush() would wait forever
+                self._queue.task_done()
+
+    def _write(
+        self,
+        source: str,
+        tables: list[list],
+        fetch_seconds: float,
+        date_range: DateRange | None,
+        windows: list[WindowResult] | None,
+        lookback: timedelta | None,
+    ) -> list[SourceRun]:
+        runs = []
+        try:
+            with span("write", source=source), db_ops.get_db() as db:
+                matched_rows = 0
+                changed_event_times = []
+                for table in tables:
+                    quarantined = getattr(table, "quarantined", None)
+                    if quarantined:
+                        with span("quarantine") as quarantine_span:
+                            db_ops.upsert_records(db, quarantined, Quarantine)
+                            quarantine_span.record(rows=len(quarantined))
+                    if not table:
+                        continue
+                    started = time.perf_counter()
+                    with span("detect_changes") as changes_span:
+                        diff = db_ops.diff_rows(db, table, table.model)
+                        changes_span.record(rows=len(diff.changed_event_times))
+                    # Only new and changed rows are sent, equal hashes are skipped
+                    with span("upsert") as upsert_span:
+                        counts = db_ops.upsert_diff(db, diff, table.model)
+                        db.flush()
+                        upsert_span.record(rows=counts.rows)
+                    if date_range:
+                        matched_rows += diff.matched
+                        changed_event_times.extend(diff.changed_event_times)
+                    runs.append(
+                        SourceRun(
+                            source=source,
+                            table_name=table.model.__tablename__,
+                            rows=counts.rows,
+                            fetch_seconds=fetch_seconds,
+                            write_seconds=time.perf_counter() - started,
+                            inserted=counts.inserted,
+                            updated=counts.updated,
+                            unchanged=counts.unchanged,
+                        )
+                    )
+                if date_range:
+                    # Only fetches overlapping stored rows say anything about changes
+                    if matched_rows:
+                        record_change_lag(
+                            db,
+                            source,
+                            changed_event_times,
+                            lookback or get_lookback(db, source),
+                            date_range.end,
+                        )
+                    # Everything before the first failed window has been fetched
+                    failed_starts = [
+                        window.date_range.start
+                        for window in windows or []
+                        if not window.ok
+                    ]
+                    set_watermark(db, source, min(failed_starts, default=date_range.end))
+                if windows:
+                    record_windows(db, source, windows, get_lookback(db, source))
+        except Exception as e:
+            # Only a failed transaction leaves the source unstored
+            return [self._failed(source, fetch_seconds, e)]
+        if tables:
+            print(
+                f"Stored {sum(run.rows for run in runs)} {source} entries "
+                f"({sum(run.inserted for run in runs)} inserted, "
+                f"{sum(run.updated for run in runs)} updated, "
+                f"{sum(run.unchanged for run in runs)} unchanged)"
+            )
+        return runs
+
+    @staticmethod
+    def _failed(source: str, fetch_seconds: float, error: Exception) -> SourceRun:
+        print(f"Error storing {source} data: {error}")
+        return SourceRun(
+            source=source,
+            table_name=None,
+            rows=0,
+            fetch_seconds=fetch_seconds,
+            error=str(error),
+        )
@@ -1,123 +1,460 @@
 from datetime import datetime, timedelta
+import argparse
 import os
+import sys
+from dataclasses import replace
+from functools import partial
+from typing import Callable
 from dotenv import load_dotenv
+import pandas as pd
 import database.operations as db_ops
+from database.coverage import has_coverage, missing_windows, seed_coverage
+from database.dedup import drop_duplicate_keys
+from database.density import peak_rows_per_day
+from database.jobs import enqueue_jobs
+from database.lookback import get_lookback
+from database.mapping import ModelRows
+from database.validation import quarantine_records
+from database.watermarks import get_watermark
+from database.writer import DatabaseWriter
+from operators import DEFAULT_OPERATOR, Operator, load_operators, run_operators
+from profiling import Profiler
+from regressions import report as regression_report
+from orchestrator import Source, SourceResult, run_sources
 from runtime_logger import RuntimeLogger
-from webscraper.easypark import EasyParkAPI
-from webscraper.giantleap import GiantleapScraper
-from webscraper.parkone import ParkOneAPI
-from webscraper.scanview import ScanviewScraper
+from tracing import Tracer, span
+from transform import set_transform_workers, transform
+from scheduler import Schedule, Scheduler, close_clients
+from worker import Worker
 from database.models import (
     EasyPark,
     Giantleap,
     Logs,
     ParkOne,
     ParkPark,
+    RunSpan,
     Scanview,
     ScanviewLog,
     Solvision,
+    SourceRun,
 )
-from webscraper.solvision import SolvisionScraper
-from webscraper.parkpark import ParkParkAPI
+from webscraper.dtypes import compact_frame, memory_bytes
+from webscraper.rate_limit import set_rate_limit
 from webscraper.utils import Credentials, DateRange, EnvManager
+from webscraper.window_planner import WindowPlanner
+
+
+# Rows a single windowed request should return. Scanview stays below its
+# 4000 row page length so busy days are not truncated.
+SCANVIEW_TARGET_ROWS = 3000
+API_TARGET_ROWS = 20_000
+
+
+def _client(clients: dict | None, key: str, factory: Callable):
+    """Return the client cached under `key`, creating it first if needed.
+    Without a cache (`clients` is None) a fresh client is created every time."""
+    if clients is None:
+        return factory()
+    if key not in clients:
+        clients[key] = factory()
+    return clients[key]
+
+
+def window_planner(
+    model_class: type,
+    target_rows: int,
+    default_days: int = 30,
+    max_days: int = 30,
+    max_rows: int | None = None,
+) -> WindowPlanner:
+    """Build a window planner from the stored number of rows per day of a model."""
+    with db_ops.get_db() as db:
+        rows_per_day = peak_rows_per_day(db, model_class)
+    return WindowPlanner(
+        rows_per_day=rows_per_day,
+        target_rows=target_rows,
+        default_days=default_days,
+        max_days=max_days,
+        max_rows=max_rows,
+    )
+
+
+def compact(name: str, data: pd.DataFrame) -> pd.DataFrame:
+    """Apply the dtype policy to a fetched frame and report the memory it saved."""
+    with span("compact") as compact_span:
+        before = memory_bytes(data)
+        data = compact_frame(data)
+        after = memory_bytes(data)
+        # The span's bytes are the bytes saved
+        compact_span.record(rows=len(data), bytes=before - after)
+    if before:
+        print(
+            f"Compacted {name} frame by {1 - after / before:.0%} "
+            f"({before / 1e6:.1f} MB -> {after / 1e6:.1f} MB)"
+        )
+    return data
+
+
+def deduplicate(model_class: type, data: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows fetched more than once and report how many there were."""
+    with span("deduplicate") as dedup_span:
+        data, duplicates = drop_duplicate_keys(model_class, data)
+        # The span's rows are the duplicates dropped
+        dedup_span.record(rows=duplicates)
+    if duplicates:
+        print(f"Dropped {duplicates} duplicate {model_class.__tablename__} rows")
+    return data
+
+
+def build_models(model_class: type, data: pd.DataFrame) -> ModelRows:
+    """
+    Map a fetched DataFrame to rows of a model, as dicts of column values.
+    Rows failing validation or conversion are quarantined instead of failing
+    the whole source, the writer stores them with the rows.
+    """
+    # Compacted first, categoricals also make the chunks sent to workers smaller
+    data = compact(model_class.__tablename__, data)
+    data = deduplicate(model_class, data)
+    with span("build_models") as build_span:
+        rows, rejected, reasons = transform(model_class, data)
+        build_span.record(rows=len(rows))
+
+    if not rejected.empty:
+        rows.quarantined = quarantine_records(model_class, rejected, reasons)
+        print(
+            f"Quarantined {len(rejected)} {model_class.__tablename__} rows: "
+            + ", ".join(
+                f"{reason} ({count})" for reason, count in reasons.value_counts().items()
+            )
+        )
+    return rows
 
 
-def get_scanview(date_range: DateRange):
+def get_scanview(
+    date_range: DateRange,
+    clients: dict | None = None,
+    operator: Operator = DEFAULT_OPERATOR,
+):
+    # Scraper modules are imported when their source runs, Selenium is slow to load
+    from webscraper.scanview import FetchPayload as ScanviewFetchPayload
+    from webscraper.scanview import ScanviewScraper
+
     # Initialize credentials and date range
     creds = Credentials(
-        username=EnvManager.get("SCANVIEW_USERNAME"),
-        password=EnvManager.get("SCANVIEW_PASSWORD"),
+        username=EnvManager.get(operator.env("SCANVIEW_USERNAME")),
+        password=EnvManager.get(operator.env("SCANVIEW_PASSWORD")),
+    )
+    scanview_scraper = _client(
+        clients, "scanview", lambda: ScanviewScraper(creds, date_range, headless=True)
     )
-    scanview_scraper = ScanviewScraper(creds, date_range, headless=True)
+    scanview_scraper.date_range = date_range
 
     # Fetch payment data
-    scanview_payments = scanview_scraper.get_payment_data()
-    scanview_orders = [
-        Scanview(order=payment_order)
-        for _, payment_order in scanview_payments.iterrows()
-    ]
+    scanview_payments = scanview_scraper.get_payment_data(
+        window_planner(
+            Scanview,
+            target_rows=SCANVIEW_TARGET_ROWS,
+            default_days=1,
+            max_rows=ScanviewFetchPayload.length,
+        )
+    )
+    scanview_orders = build_models(Scanview, scanview_payments)
     print(f"Fetched {len(scanview_orders)} Scanview orders")
 
     # Fetch parking logs
-    logs = scanview_scraper.get_parking_logs()
-    scanview_logs = [
-        ScanviewLog(log=scanview_log) for _, scanview_log in logs.iterrows()
-    ]
+    logs = scanview_scraper.get_parking_logs(
+        window_planner(
+            ScanviewLog,
+            target_rows=SCANVIEW_TARGET_ROWS,
+            default_days=1,
+            max_rows=ScanviewFetchPayload.length,
+        )
+    )
+    scanview_logs = build_models(ScanviewLog, logs)
     print(f"Fetched {len(scanview_logs)} Scanview logs")
     return scanview_orders, scanview_logs
 
 
-def get_solvision(date_range: DateRange):
+def get_solvision(
+    date_range: DateRange,
+    clients: dict | None = None,
+    operator: Operator = DEFAULT_OPERATOR,
+):
+    from webscraper.solvision import SolvisionScraper
+
     creds = Credentials(
-        username=EnvManager.get("SOLVISION_USERNAME"),
-        password=EnvManager.get("SOLVISION_PASSWORD"),
+        username=EnvManager.get(operator.env("SOLVISION_USERNAME")),
+        password=EnvManager.get(operator.env("SOLVISION_PASSWORD")),
     )
 
     # time.sleep(5)  # Wait for login to complete
 
-    data_scraper = SolvisionScraper(creds, date_range, headless=True)
+    data_scraper = _client(
+        clients,
+        "solvision",
+        lambda: SolvisionScraper(
+            creds, date_range, headless=True, meters=operator.solvision_meters
+        ),
+    )
+    data_scraper.date_range = date_range
     data = data_scraper.fetch()
 
     # Remove summary row
     total_row = data[data["cardFirm"] == "Total"]
     data.drop(total_row.index, inplace=True)
 
-    solvision_data = [Solvision(order=order) for _, order in data.iterrows()]
+    solvision_data = build_models(Solvision, data)
     print(f"Fetched {len(solvision_data)} Solvision orders")
 
     return solvision_data
 
 
-def get_giantleap(date_range: DateRange):
+def get_giantleap(
+    date_range: DateRange,
+    clients: dict | None = None,
+    operator: Operator = DEFAULT_OPERATOR,
+):
+    from webscraper.giantleap import GiantleapScraper
+
     creds = Credentials(
-        username=EnvManager.get("GIANTLEAP_USERNAME"),
-        password=EnvManager.get("GIANTLEAP_PASSWORD"),
+        username=EnvManager.get(operator.env("GIANTLEAP_USERNAME")),
+        password=EnvManager.get(operator.env("GIANTLEAP_PASSWORD")),
     )
-    data_fetcher = GiantleapScraper(creds, date_range, headless=True)
+    data_fetcher = _client(
+        clients,
+        "giantleap",
+        lambda: GiantleapScraper(
+            creds,
+            date_range,
+            headless=True,
+            **operator.kwargs(
+                operator_id=operator.giantleap_operator_id,
+                base_url=operator.giantleap_base_url,
+            ),
+        ),
+    )
+    data_fetcher.date_range = date_range
     data = data_fetcher.fetch()
 
-    giantleap_data = [Giantleap(order=order) for _, order in data.iterrows()]
+    giantleap_data = build_models(Giantleap, data)
     print(f"Fetched {len(giantleap_data)} Giantleap orders")
 
     return giantleap_data
 
 
-def get_parkpark(date_range: DateRange):
-    api_key = EnvManager.get("PARKPARK_API_KEY")
-    parkpark_api = ParkParkAPI(api_key, date_range)
+def get_parkpark(
+    date_range: DateRange,
+    clients: dict | None = None,
+    operator: Operator = DEFAULT_OPERATOR,
+):
+    from webscraper.parkpark import ParkParkAPI
+
+    api_key = EnvManager.get(operator.env("PARKPARK_API_KEY"))
+    parkpark_api = _client(clients, "parkpark", lambda: ParkParkAPI(api_key, date_range))
+    parkpark_api.date_range = date_range
     parking_data = parkpark_api.fetch_parkings()
-    parkpark_data = [ParkPark(entry) for _, entry in parking_data.iterrows()]
+    parkpark_data = build_models(ParkPark, parking_data)
     print(f"Fetched {len(parkpark_data)} ParkPark parking entries")
     return parkpark_data
 
 
-def get_parkone(date_range: DateRange):
-    parkone_api = ParkOneAPI(date_range)
+def get_parkone(
+    date_range: DateRange,
+    clients: dict | None = None,
+    operator: Operator = DEFAULT_OPERATOR,
+):
+    from webscraper.parkone import ParkOneAPI
+
+    parkone_api = _client(
+        clients,
+        "parkone",
+        lambda: ParkOneAPI(
+            date_range,
+            api_key=os.getenv(operator.env("PARKONE_API_KEY"), ""),
+            **operator.kwargs(municipality=operator.parkone_municipality),
+        ),
+    )
+    parkone_api.date_range = date_range
+    parkone_api.planner = window_planner(ParkOne, target_rows=API_TARGET_ROWS)
     parking_data = parkone_api.get_all_parkings()
-    parkone_data = [ParkOne(entry) for _, entry in parking_data.iterrows()]
+    parkone_data = build_models(ParkOne, parking_data)
     print(f"Fetched {len(parkone_data)} ParkOne parking entries")
     return parkone_data
 
 
-def get_easypark(date_range: DateRange):
-    easypark_api = EasyParkAPI()
-    easypark_data = easypark_api.get_parking(date_range)
-    easypark_data = [EasyPark(entry) for _, entry in easypark_data.iterrows()]
+def get_easypark(
+    date_range: DateRange,
+    clients: dict | None = None,
+    operator: Operator = DEFAULT_OPERATOR,
+):
+    from webscraper.easypark import EasyParkAPI
+
+    easypark_api = _client(
+        clients,
+        "easypark",
+        lambda: EasyParkAPI(
+            username=os.getenv(operator.env("EASYPARK_USERNAME")),
+            password=os.getenv(operator.env("EASYPARK_PASSWORD")),
+            **operator.kwargs(operator_id=operator.easypark_operator_id),
+        ),
+    )
+    easypark_data = easypark_api.get_parking(
+        date_range, window_planner(EasyPark, target_rows=API_TARGET_ROWS)
+    )
+    easypark_data = build_models(EasyPark, easypark_data)
     print(f"Fetched {len(easypark_data)} EasyPark parking entries")
     return easypark_data
 
 
-def main():
-    load_dotenv()
-    tables = []
-    date_range = DateRange(start=datetime(2025, 9, 20), end=datetime.now())
+SOURCES = [
+    Source("Scanview", get_scanview, ["scanview_entries", "scanview_log_entries"]),
+    Source("Solvision", get_solvision, ["solvision_entries"]),
+    Source("Giantleap", get_giantleap, ["giantleap_entries"]),
+    Source("ParkPark", get_parkpark, ["parkpark_entries"], deadline_seconds=10 * 60),
+    Source("ParkOne", get_parkone, ["parkone_entries"], deadline_seconds=10 * 60),
+    Source("EasyPark", get_easypark, ["easypark_entries"], deadline_seconds=10 * 60),
+]
+
+
+def operator_sources(operator: Operator) -> list[Source]:
+    """The sources an operator uses, fetching with the operator's credentials and IDs."""
+    return [
+        replace(source, fetch=partial(source.fetch, operator=operator))
+        for source in SOURCES
+        if operator.sources is None or source.name in operator.sources
+    ]
+
+
+# Polling interval of each source in daemon mode
+DEFAULT_INTERVALS = {
+    "Scanview": timedelta(hours=1),
+    "Solvision": timedelta(hours=1),
+    "Giantleap": timedelta(hours=1),
+    "ParkPark": timedelta(minutes=15),
+    "ParkOne": timedelta(minutes=5),
+    "EasyPark": timedelta(minutes=5),
+}
+
+# First date fetched for a source that has never been ingested
+INITIAL_START = datetime(2025, 9, 20)
+
+
+def plan_date_ranges(
+    sources: list[Source], end: datetime
+) -> tuple[dict[str, list[DateRange]], dict[str, timedelta]]:
+    """
+    Plan the date ranges of each source from its coverage ledger: everything
+    since INITIAL_START that was never fetched, failed, or was fetched while
+    still within the source's adaptive lookback, so rows changed after the fact
+    are caught.
+
+    Returns:
+        The date ranges and the lookback they were planned with, keyed by
+        source name
+    """
+    last_run = None
+    date_ranges = {}
+    lookbacks = {}
+    with db_ops.get_db() as db:
+        for source in sources:
+            if not has_coverage(db, source.name):
+                # Before the ledger existed a source was tracked by its watermark,
+                # falling back to the runtime log
+                watermark = get_watermark(db, source.name)
+                if watermark is None:
+                    if last_run is None:
+                        last_run = (
+                            RuntimeLogger().get_last_runtime(status="SUCCESS")
+                            or INITIAL_START
+                        )
+                    watermark = last_run
+                seed_coverage(db, source.name, INITIAL_START, watermark)
+                db.flush()
+            lookback = get_lookback(db, source.name)
+            gaps = missing_windows(db, source.name, INITIAL_START, end, lookback)
+            date_ranges[source.name] = gaps
+            lookbacks[source.name] = lookback
+            print(
+                f"{source.name}: fetching {len(gaps)} window(s) from "
+                f"{gaps[0].start} (lookback {lookback})"
+            )
+    return date_ranges, lookbacks
+
+
+def to_run_spans(tracer: Tracer) -> list[RunSpan]:
+    """Convert the spans collected by a tracer into RunSpan rows, keeping nesting."""
+    records: dict[int, RunSpan] = {}
+    # Parents start before their children, so they are converted first
+    for traced in sorted(tracer.spans, key=lambda traced: traced._started):
+        record = RunSpan(
+            source=traced.source,
+            name=traced.name,
+            started_at=traced.started_at,
+            duration_seconds=traced.duration_seconds,
+            rows=traced.rows,
+            bytes=traced.bytes,
+        )
+        if traced.parent is not None:
+            record.parent = records.get(id(traced.parent))
+        records[id(traced)] = record
+    return list(records.values())
+
+
+def run(
+    sources: list[Source],
+    clients: dict | None = None,
+    profiler: Profiler | None = None,
+    scheduled: bool = False,
+):
+    """
+    Fetch and store the given sources once and log the run.
+
+    Args:
+        sources: Sources to ingest
+        clients: Optional cache of API/scraper clients, reused across runs so
+            authenticated sessions stay warm. Without it each source gets its
+            own client for the run, used for all of its windows and closed as
+            soon as the source has finished.
+        profiler: Optional profiler. Sources are then run one at a time and
+            each source's fetch of every gap and its upsert are profiled
+            separately.
+        scheduled: Whether this is a daemon tick of a single source. Ticks are
+            logged as scheduled and not added to the runtime log file.
+    """
+    with Tracer().activate() as tracer:
+        return _run(sources, clients, tracer, profiler, scheduled)
+
+
+def _run(
+    sources: list[Source],
+    clients: dict | None,
+    tracer: Tracer,
+    profiler: Profiler | None,
+    scheduled: bool,
+):
     run_time = datetime.now()
     runtime_log = RuntimeLogger()
-    last_run = runtime_log.get_last_runtime(status="SUCCESS")
-    if last_run:
-        print(f"Last successful run: {last_run}")
-        date_range.start = last_run - timedelta(days=7)
-        print(f"Adjusted date range start to: {date_range.start}")
+    date_ranges, lookbacks = plan_date_ranges(sources, end=run_time)
+    # Clients created for this run only, closed when their source is done
+    run_clients = {source.name: {} for source in sources} if clients is None else {}
+    sources = [
+        replace(
+            source,
+            fetch=partial(
+                source.fetch, clients=run_clients.get(source.name, clients)
+            ),
+        )
+        for source in sources
+    ]
+    if profiler is not None:
+        sources = [
+            replace(source, fetch=profiler.wrap(f"{source.name}_fetch", source.fetch))
+            for source in sources
+        ]
+    date_range = DateRange(
+        start=min(gaps[0].start for gaps in date_ranges.values()),
+        end=run_time,
+    )
 
     # Track counts and errors for each data source
     entry_counts = {
@@ -130,63 +467,77 @@ def main():
         "easypark_entries": 0,
     }
     errors = []
-
+    source_runs: list[SourceRun] = []
+
+    # Each source is written in its own transaction as soon as it is fetched
+    writer = DatabaseWriter(profiler=profiler).start()
+
+    def handle_result(result: SourceResult):
+        if result.source.name in run_clients:
+            close_clients(run_clients[result.source.name])
+        elif not result.ok:
+            # A failed or timed out source may still be using its clients, closing
+            # them fails its blocked calls, and the next run logs in again
+            close_clients(clients)
+        if result.ok:
+            for key, table in zip(result.source.count_keys, result.tables):
+                entry_counts[key] = len(table)
+            # Failed windows are skipped by the clients and fetched again next
+            # run, the run is still logged as partially failed
+            for window in result.windows:
+                if not window.ok:
+                    error = (
+                        f"{result.source.name}: window {window.date_range.start} - "
+                        f"{window.date_range.end} failed: {window.error}"
+                    )
+                    errors.append(error)
+                    print(f"Error fetching {error}")
+            writer.submit(
+                result.source.name,
+                result.tables,
+                result.elapsed,
+                date_range=result.date_range,
+                windows=result.windows,
+                lookback=lookbacks[result.source.name],
+            )
+            # The writer owns the records from here on
+            result.tables = []
+        else:
+            errors.append(f"{result.source.name}: {result.error}")
+            print(f"Error fetching {result.source.name} data: {result.error}")
+            writer.submit(result.source.name, [], result.elapsed, windows=result.windows)
+            source_runs.append(
+                SourceRun(
+                    source=result.source.name,
+                    table_name=None,
+                    rows=0,
+                    fetch_seconds=result.elapsed,
+                    error=result.error,
+                )
+            )
+
+    log_stored = False
     try:
-        # Get Scanview data
-        try:
-            scanview_orders, scanview_logs = get_scanview(date_range)
-            tables.append(scanview_orders)
-            tables.append(scanview_logs)
-            entry_counts["scanview_entries"] = len(scanview_orders)
-            entry_counts["scanview_log_entries"] = len(scanview_logs)
-        except Exception as e:
-            errors.append(f"Scanview: {str(e)}")
-            print(f"Error fetching Scanview data: {e}")
-
-        # Get Solvision data
-        try:
-            solvision_orders = get_solvision(date_range)
-            tables.append(solvision_orders)
-            entry_counts["solvision_entries"] = len(solvision_orders)
-        except Exception as e:
-            errors.append(f"Solvision: {str(e)}")
-            print(f"Error fetching Solvision data: {e}")
-
-        # Get Giantleap data
         try:
-            giantleap_orders = get_giantleap(date_range)
-            tables.append(giantleap_orders)
-            entry_counts["giantleap_entries"] = len(giantleap_orders)
-        except Exception as e:
-            errors.append(f"Giantleap: {str(e)}")
-            print(f"Error fetching Giantleap data: {e}")
-
-        # Get ParkPark data
-        try:
-            parkpark_overview = get_parkpark(date_range)
-            tables.append(parkpark_overview)
-            entry_counts["parkpark_entries"] = len(parkpark_overview)
-        except Exception as e:
-            errors.append(f"ParkPark: {str(e)}")
-            print(f"Error fetching ParkPark data: {e}")
-
-        # Get ParkOne data
-        try:
-            parkone_data = get_parkone(date_range)
-            tables.append(parkone_data)
-            entry_counts["parkone_entries"] = len(parkone_data)
-        except Exception as e:
-            errors.append(f"ParkOne: {str(e)}")
-            print(f"Error fetching ParkOne data: {e}")
-
-        # Get EasyPark data
-        try:
-            easypark_data = get_easypark(date_range)
-            tables.append(easypark_data)
-            entry_counts["easypark_entries"] = len(easypark_data)
-        except Exception as e:
-            errors.append(f"EasyPark: {str(e)}")
-            print(f"Error fetching EasyPark data: {e}")
+            if profiler is None:
+                # Fetch all sources concurrently, each bounded by its own deadline
+                run_sources(sources, date_ranges, on_result=handle_result)
+            else:
+                # Profile one source at a time so the profiles do not mix
+                for source in sources:
+                    run_sources([source], date_ranges, on_result=handle_result)
+                    writer.flush()
+        finally:
+            source_runs.extend(writer.close())
+            for source_clients in run_clients.values():
+                close_clients(source_clients)
+
+        # Sources that could not be stored count as failed
+        for source in sources:
+            if source.name in writer.failed_sources():
+                errors.append(f"{source.name}: failed to store data")
+                for key in source.count_keys:
+                    entry_counts[key] = 0
 
         # Determine overall status
         if errors:
@@ -197,10 +548,11 @@ def main():
             message = "Successfully fetched all data"
 
         # Create log entry
-        runtime_log.save_log(
-            start_time=run_time,
-            status=status,
-        )
+        if not scheduled:
+            runtime_log.save_log(
+                start_time=run_time,
+                status=status,
+            )
         runtime = (datetime.now() - run_time).total_seconds()
         log_entry = Logs(
             run_time=run_time,
@@ -216,19 +568,23 @@ def main():
             status=status,
             message=message,
             runtime_seconds=runtime,
+            scheduled=scheduled,
         )
+        log_entry.source_runs = source_runs
+        log_entry.spans = to_run_spans(tracer)
 
-        # Store data in the database using upsert
         with db_ops.get_db() as db:
-            for table in tables:
-                db_ops.upsert_records(db, table)
             db.add(log_entry)
+        log_stored = True
 
         # Raise exception if all sources failed
         if status == "FAILED":
             raise Exception(message)
 
     except Exception as e:
+        if log_stored:
+            raise
+
         # Create failure log entry if not already created
         runtime = (datetime.now() - run_time).total_seconds()
         log_entry = Logs(
@@ -245,7 +601,9 @@ def main():
             status="FAILED",
             message=str(e),
             runtime_seconds=runtime,
+            scheduled=scheduled,
         )
+        log_entry.spans = to_run_spans(tracer)
 
         with db_ops.get_db() as db:
             db.add(log_entry)
@@ -253,6 +611,178 @@ def main():
         raise
 
 
+def enqueue(
+    sources: list[Source], date_range: DateRange, window_days: int, force: bool
+) -> None:
+    """Queue jobs of `window_days` days covering the date range of each source."""
+    with db_ops.get_db() as db:
+        for source in sources:
+            if force:
+                gaps = [date_range]
+            else:
+                lookback = get_lookback(db, source.name)
+                gaps = missing_windows(
+                    db, source.name, date_range.start, date_range.end, lookback
+                )
+            windows = [window for gap in gaps for window in gap.split(window_days)]
+            added = enqueue_jobs(db, source.name, windows)
+            print(f"{source.name}: queued {added} of {len(windows)} windows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest parking data")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile CPU time and memory of each source's fetch and upsert",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="profiles",
+        help="Directory in which a folder with the run's profiles is created",
+    )
+    parser.add_argument(
+        "--operator",
+        default=DEFAULT_OPERATOR.name,
+        help="Operator (municipality) to ingest, as named in operators.toml",
+    )
+    parser.add_argument(
+        "--transform-workers",
+        type=int,
+        default=1,
+        help="Processes mapping very large fetched frames in chunks (default: 1)",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    operators_parser = subparsers.add_parser(
+        "operators",
+        help="Run a command for every operator at once, one process per operator",
+    )
+    operators_parser.add_argument(
+        "--only",
+        action="append",
+        metavar="OPERATOR",
+        help="Operator to run, repeatable (default: all)",
+    )
+    operators_parser.add_argument(
+        "command_args",
+        nargs=argparse.REMAINDER,
+        help="Command to run for each operator, e.g. daemon",
+    )
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="Keep running and ingest each source on its own cadence"
+    )
+    daemon_parser.add_argument(
+        "--interval",
+        action="append",
+        default=[],
+        metavar="SOURCE=MINUTES",
+        help="Override the polling interval of a source, e.g. ParkOne=5",
+    )
+    enqueue_parser = subparsers.add_parser(
+        "enqueue", help="Queue (source, window) jobs for worker processes"
+    )
+    enqueue_parser.add_argument(
+        "--source",
+        action="append",
+        choices=[source.name for source in SOURCES],
+        help="Source to queue, repeatable (default: all)",
+    )
+    enqueue_parser.add_argument(
+        "--start", type=datetime.fromisoformat, default=INITIAL_START
+    )
+    enqueue_parser.add_argument("--end", type=datetime.fromisoformat)
+    enqueue_parser.add_argument("--window-days", type=int, default=30)
+    enqueue_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Queue the whole range, also windows the coverage ledger has settled",
+    )
+    worker_parser = subparsers.add_parser(
+        "worker", help="Run queued jobs, alongside any number of other workers"
+    )
+    worker_parser.add_argument("--worker-id", help="Default: <hostname>-<pid>")
+    worker_parser.add_argument("--lease-minutes", type=float, default=5)
+    worker_parser.add_argument(
+        "--until-empty", action="store_true", help="Exit once the queue is drained"
+    )
+    report_parser = subparsers.add_parser(
+        "report",
+        help="Compare recent runs with the run history, exit 1 on a regression",
+    )
+    report_parser.add_argument(
+        "--hours", type=float, default=24, help="Check the runs of the last HOURS"
+    )
+    report_parser.add_argument(
+        "--window", type=int, default=30, help="Previous runs making up a baseline"
+    )
+    report_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=3.5,
+        help="Robust z-score beyond which a run counts as a regression",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    operators = load_operators()
+    if args.command == "operators":
+        selected = [
+            operator
+            for name, operator in operators.items()
+            if args.only is None or name in args.only
+        ]
+        failed = run_operators(selected, args.command_args)
+        sys.exit(1 if failed else 0)
+
+    if args.operator not in operators:
+        sys.exit(f"Unknown operator {args.operator}, known: {', '.join(operators)}")
+    operator = operators[args.operator]
+    if operator.database_url != os.getenv("DATABASE_URL"):
+        sys.exit(
+            f"DATABASE_URL is not the database of {operator.name}, "
+            "run it through `main.py operators` instead"
+        )
+    set_rate_limit(operator.requests_per_second)
+    set_transform_workers(args.transform_workers)
+    sources = operator_sources(operator)
+
+    if args.command == "report":
+        regressions = regression_report(args.hours, args.window, args.threshold)
+        sys.exit(1 if regressions else 0)
+    elif args.command == "enqueue":
+        enqueue(
+            [source for source in sources if source.name in (args.source or [])]
+            or sources,
+            DateRange(args.start, args.end or datetime.now()),
+            args.window_days,
+            args.force,
+        )
+    elif args.command == "worker":
+        worker = Worker(
+            sources,
+            worker_id=args.worker_id,
+            lease=timedelta(minutes=args.lease_minutes),
+        )
+        jobs_run = worker.run_forever(until_empty=args.until_empty)
+        print(f"Ran {jobs_run} jobs")
+    elif args.command == "daemon":
+        intervals = dict(DEFAULT_INTERVALS)
+        for override in args.interval:
+            name, minutes = override.split("=", 1)
+            intervals[name] = timedelta(minutes=float(minutes))
+        schedules = [Schedule(source, intervals[source.name]) for source in sources]
+        Scheduler(schedules, partial(run, scheduled=True)).run_forever()
+    else:
+        profiler = None
+        if args.profile:
+            run_dir = os.path.join(
+                args.profile_dir, datetime.now().strftime("%Y%m%d-%H%M%S")
+            )
+            profiler = Profiler(run_dir)
+            print(f"Writing profiles to {run_dir}")
+        run(sources, profiler=profiler)
+
+
 if __name__ == "__main__":
     main()
     print("Done")
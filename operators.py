@@ -0,0 +1,106 @@
+import os
+import subprocess
+import sys
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+
+OPERATORS_FILE = "operators.toml"
+
+
+@dataclass
+class Operator:
+    """
+    A municipality (tenant) to ingest, with its vendor IDs.
+
+    Secrets are not part of the profile: an operator reads its credentials and
+    its DATABASE_URL from the usual environment variables prefixed with
+    `env_prefix`, e.g. HORSENS_SCANVIEW_USERNAME. IDs left as None use the
+    clients' defaults, which belong to Vejle.
+    """
+
+    name: str
+    env_prefix: str = ""
+    # Names of the sources the operator uses, None for all
+    sources: list[str] | None = None
+    # Request budget per second shared by all of the operator's clients
+    requests_per_second: float | None = None
+    parkone_municipality: str | None = None
+    giantleap_operator_id: str | None = None
+    giantleap_base_url: str | None = None
+    easypark_operator_id: int | None = None
+    solvision_meters: list[int] | None = None
+
+    def env(self, name: str) -> str:
+        """Name of the environment variable `name` for this operator."""
+        return f"{self.env_prefix}{name}"
+
+    @property
+    def database_url(self) -> str | None:
+        return os.getenv(self.env("DATABASE_URL"))
+
+    def kwargs(self, **ids) -> dict:
+        """Keyword arguments for a client, leaving out IDs that are not set."""
+        return {key: value for key, value in ids.items() if value is not None}
+
+
+DEFAULT_OPERATOR = Operator("vejle")
+
+
+def load_operators(path: str | Path | None = None) -> dict[str, Operator]:
+    """
+    Read the operator profiles from a TOML file with one [operators.<name>]
+    table per operator (see operators.example.toml). Without a file only the
+    default operator is known.
+    """
+    path = Path(path or os.getenv("OPERATORS_FILE", OPERATORS_FILE))
+    if not path.exists():
+        return {DEFAULT_OPERATOR.name: DEFAULT_OPERATOR}
+    with path.open("rb") as f:
+        profiles = tomllib.load(f).get("operators", {})
+    known = set(Operator.__dataclass_fields__) - {"name"}
+    operators = {}
+    for name, profile in profiles.items():
+        unknown = set(profile) - known
+        if unknown:
+            raise ValueError(f"Unknown settings for operator {name}: {sorted(unknown)}")
+        operators[name] = Operator(name=name, **profile)
+    for operator in operators.values():
+        if not operator.database_url:
+            raise EnvironmentError(
+                f"Operator {operator.name} has no database, "
+                f"set {operator.env('DATABASE_URL')}"
+            )
+    return operators
+
+
+def run_operators(operators: list[Operator], args: list[str]) -> int:
+    """
+    Run `main.py <args>` for every operator at once, each in its own process
+    writing to the operator's own database.
+
+    Returns:
+        The number of operators whose process failed
+    """
+    # Tenants share no tables, so every operator needs a database of its own
+    urls = [operator.database_url for operator in operators]
+    for operator in operators:
+        if urls.count(operator.database_url) > 1:
+            raise EnvironmentError(
+                f"Operator {operator.name} shares its database with another operator"
+            )
+
+    processes = {}
+    for operator in operators:
+        env = dict(os.environ, DATABASE_URL=operator.database_url)
+        command = [sys.executable, "main.py", "--operator", operator.name, *args]
+        print(f"Starting {operator.name}: {' '.join(command[1:])}")
+        processes[operator.name] = subprocess.Popen(command, env=env)
+
+    failed = 0
+    for name, process in processes.items():
+        returncode = process.wait()
+        if returncode != 0:
+            print(f"{name} exited with code {returncode}")
+            failed += 1
+    return failed
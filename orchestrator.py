@@ -0,0 +1,155 @@
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from tracing import span
+from webscraper.utils import DateRange
+from webscraper.window_log import WindowLog, WindowResult
+
+
+@dataclass
+class Source:
+    name: str
+    fetch: Callable[[DateRange], list | tuple]
+    count_keys: list[str]
+    deadline_seconds: float = 30 * 60
+
+
+@dataclass
+class SourceResult:
+    source: Source
+    date_ranges: list[DateRange]
+    tables: list[list] = field(default_factory=list)
+    # Outcome of every window fetched, for the coverage ledger
+    windows: list[WindowResult] = field(default_factory=list)
+    error: str | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def date_range(self) -> DateRange:
+        """The range spanned by all fetched date ranges."""
+        return DateRange(
+            start=min(date_range.start for date_range in self.date_ranges),
+            end=max(date_range.end for date_range in self.date_ranges),
+        )
+
+
+def _fetch_tables(source: Source, date_range: DateRange) -> list[list]:
+    tables = source.fetch(date_range)
+    # Sources returning several tables (e.g. Scanview) return a tuple
+    return list(tables) if isinstance(tables, tuple) else [tables]
+
+
+def _run_source(
+    source: Source, date_ranges: list[DateRange], results: queue.Queue
+) -> None:
+    started = time.monotonic()
+    window_log = WindowLog()
+    try:
+        with window_log.activate(), span("fetch", source=source.name) as fetch_span:
+            tables: list[list] = []
+            for date_range in date_ranges:
+                reported = len(window_log.windows)
+                fetched = _fetch_tables(source, date_range)
+                if len(window_log.windows) == reported:
+                    # Clients fetching in a single request do not report windows
+                    window_log.windows.append(
+                        WindowResult(date_range, sum(len(table) for table in fetched))
+                    )
+                tables = (
+                    [table + more for table, more in zip(tables, fetched)]
+                    if tables
+                    else fetched
+                )
+            fetch_span.record(rows=sum(len(table) for table in tables))
+        result = SourceResult(
+            source, date_ranges, tables=tables, windows=window_log.windows
+        )
+    except Exception as e:
+        windows = [WindowResult(date_range, error=str(e)) for date_range in date_ranges]
+        result = SourceResult(source, date_ranges, windows=windows, error=str(e))
+    result.elapsed = time.monotonic() - started
+    results.put(result)
+
+
+def run_sources(
+    sources: list[Source],
+    date_ranges: dict[str, list[DateRange]],
+    on_result: Callable[[SourceResult], None] | None = None,
+) -> list[SourceResult]:
+    """
+    Run all sources concurrently, each in its own thread, and collect the results.
+
+    A source that has not finished within its `deadline_seconds` is reported as
+    timed out and its thread abandoned, threads cannot be cancelled. The thread
+    is stopped by its clients instead: `on_result` is expected to close the
+    clients of a timed out source, which fails a blocked Selenium call, and
+    every HTTP request fails after REQUEST_TIMEOUT_SECONDS. The threads are
+    daemons, so an abandoned source cannot keep the process alive.
+
+    Args:
+        sources: Sources to run
+        date_ranges: Date ranges to fetch for each source, keyed by source name
+        on_result: Optional callback, called from the calling thread as soon as
+            each source has finished (or timed out)
+
+    Returns:
+        One SourceResult per source, in the order of `sources`
+    """
+    results: queue.Queue[SourceResult] = queue.Queue()
+    started = time.monotonic()
+    deadlines = {
+        source.name: started + source.deadline_seconds for source in sources
+    }
+    for source in sources:
+        # Run each source in a copy of the current context so it is traced
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_run_source, source, date_ranges[source.name], results),
+            name=f"source-{source.name}",
+            daemon=True,
+        ).start()
+
+    finished: dict[str, SourceResult] = {}
+    pending = {source.name: source for source in sources}
+    while pending:
+        timeout = max(0.0, min(deadlines[name] for name in pending) - time.monotonic())
+        try:
+            result = results.get(timeout=timeout)
+        except queue.Empty:
+            now = time.monotonic()
+            for name in [name for name in pending if deadlines[name] <= now]:
+                source = pending[name]
+                error = f"Timed out after {source.deadline_seconds:.0f} seconds"
+                result = SourceResult(
+                    source,
+                    date_ranges[name],
+                    windows=[
+                        WindowResult(date_range, error=error)
+                        for date_range in date_ranges[name]
+                    ],
+                    error=error,
+                    elapsed=now - started,
+                )
+                print(f"{name} did not finish before its deadline, abandoning it")
+                del pending[name]
+                finished[name] = result
+                if on_result:
+                    on_result(result)
+            continue
+
+        # Results of sources that already timed out are discarded
+        if result.source.name not in pending:
+            continue
+        del pending[result.source.name]
+        finished[result.source.name] = result
+        if on_result:
+            on_result(result)
+
+    return [finished[source.name] for source in sources]
@@ -0,0 +1,85 @@
+import cProfile
+import io
+import pstats
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+class Profiler:
+    """
+    Profile named stages of a run with cProfile and tracemalloc.
+
+    For every stage `<name>.prof` (loadable with pstats or snakeviz),
+    `<name>_cpu.txt` (top functions by cumulative time) and
+    `<name>_allocations.txt` (peak memory and top allocation sites) are written
+    to `run_dir`. A stage profiled again, such as the fetch of every gap of a
+    source, is written as `<name>_2`, `<name>_3` and so on. Both profilers only
+    give meaningful numbers for one stage at a time, so stages must not run
+    concurrently.
+
+    cProfile only sees the thread that entered the stage. Work the clients hand
+    to other threads (the HTTP requests and JSON parsing they run through
+    asyncio.to_thread) is missing from the CPU profile, while tracemalloc
+    traces the allocations of every thread.
+    """
+
+    def __init__(self, run_dir: str | Path, top_n: int = 25):
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.top_n = top_n
+        self._calls: Counter[str] = Counter()
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        self._calls[name] += 1
+        if self._calls[name] > 1:
+            name = f"{name}_{self._calls[name]}"
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self._write_cpu(name, profiler)
+            self._write_allocations(name, snapshot, current, peak)
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Return `func` profiled as stage `name` on every call."""
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.profile(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def _write_cpu(self, name: str, profiler: cProfile.Profile) -> None:
+        profiler.dump_stats(self.run_dir / f"{name}.prof")
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        (self.run_dir / f"{name}_cpu.txt").write_text(report.getvalue())
+
+    def _write_allocations(
+        self, name: str, snapshot: tracemalloc.Snapshot, current: int, peak: int
+    ) -> None:
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        lines = [
+            f"Current traced memory: {current / 1024**2:.1f} MiB",
+            f"Peak traced memory: {peak / 1024**2:.1f} MiB",
+            "",
+            f"Top {self.top_n} allocation sites:",
+        ]
+        for stat in snapshot.statistics("lineno")[: self.top_n]:
+            lines.append(str(stat))
+        (self.run_dir / f"{name}_allocations.txt").write_text("\n".join(lines) + "\n")
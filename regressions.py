@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import database.operations as db_ops
+from database.history import run_history, source_run_history
+
+# Direction in which each metric regresses: 1 if higher is worse, -1 if lower is
+METRICS = {
+    "rows_per_second": -1,
+    "rows": -1,
+    "fetch_seconds": 1,
+    "write_seconds": 1,
+    "http_seconds": 1,
+    "runtime_seconds": 1,
+}
+ALL_SOURCES = "All sources"
+SCHEDULED_SUFFIX = " (scheduled)"
+
+
+@dataclass
+class Regression:
+    run_time: datetime
+    source: str
+    metric: str
+    value: float
+    baseline: float
+    score: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.run_time:%Y-%m-%d %H:%M} {self.source} {self.metric}: "
+            f"{self.value:.4g} vs baseline {self.baseline:.4g} (score {self.score:+.1f})"
+        )
+
+
+def rolling_baseline(
+    values: pd.Series, window: int, min_history: int, min_relative: float = 0.05
+) -> pd.DataFrame:
+    """
+    Median of the `window` values before each value and the robust z-score of
+    the value against them (its distance from the median in scaled median
+    absolute deviations). The spread is at least `min_relative` of the median,
+    so a perfectly steady history does not flag noise.
+    """
+    history = values.shift(1).rolling(window, min_periods=min_history)
+    median = history.median()
+    mad = history.apply(lambda x: np.median(np.abs(x - np.median(x))), raw=True)
+    spread = np.maximum(mad * 1.4826, median.abs() * min_relative)
+    score = (values - median) / spread.replace(0, np.nan)
+    return pd.DataFrame({"baseline": median, "score": score})
+
+
+def find_regressions(
+    history: pd.DataFrame,
+    since: datetime,
+    window: int = 30,
+    threshold: float = 3.5,
+    min_history: int = 5,
+) -> list[Regression]:
+    """
+    Runs since `since` whose metrics are `threshold` robust z-scores worse than
+    the baseline of the source's previous runs.
+
+    Args:
+        history: One row per run and source with run_time, source and metrics
+        since: Start of the runs to check, earlier runs only serve as baseline
+        window: Number of previous runs a baseline is made of
+        threshold: Score beyond which a run is flagged
+        min_history: Runs needed before a source's metrics are checked
+    """
+    regressions = []
+    for source, runs in history.groupby("source"):
+        runs = runs.sort_values("run_time")
+        checked = runs["run_time"] >= since
+        for metric, direction in METRICS.items():
+            scored = rolling_baseline(
+                runs[metric].astype(float), window, min_history
+            )[checked]
+            flagged = scored[scored["score"] * direction > threshold]
+            for index, row in flagged.iterrows():
+                regressions.append(
+                    Regression(
+                        run_time=runs.at[index, "run_time"],
+                        source=source,
+                        metric=metric,
+                        value=runs.at[index, metric],
+                        baseline=row["baseline"],
+                        score=row["score"],
+                    )
+                )
+    return sorted(regressions, key=lambda regression: regression.run_time)
+
+
+def load_history(since: datetime) -> pd.DataFrame:
+    """Per source and whole-run metrics of the runs since `since`."""
+    with db_ops.get_db() as db:
+        sources = source_run_history(db, since)
+        runs = run_history(db, since)
+    # Daemon ticks fetch minutes of data, they are compared with each other only
+    scheduled = sources.pop("scheduled").fillna(False).astype(bool)
+    sources["source"] = sources["source"].where(
+        ~scheduled, sources["source"] + SCHEDULED_SUFFIX
+    )
+    seconds = sources["fetch_seconds"] + sources["write_seconds"].fillna(0)
+    # An empty fetch says nothing about speed, the rows metric covers it
+    sources["rows_per_second"] = (sources["rows"] / seconds).where(sources["rows"] > 0)
+    runs["source"] = ALL_SOURCES
+    return pd.concat([sources, runs], ignore_index=True)
+
+
+def summarize(history: pd.DataFrame, since: datetime, window: int) -> pd.DataFrame:
+    """Latest checked run of each source next to percentiles of its baseline runs."""
+    rows = []
+    for source, runs in history.groupby("source"):
+        runs = runs.sort_values("run_time")
+        baseline = runs[runs["run_time"] < since].tail(window)
+        recent = runs[runs["run_time"] >= since]
+        if recent.empty:
+            continue
+        latest = recent.iloc[-1]
+        seconds = (
+            baseline["runtime_seconds"]
+            if source == ALL_SOURCES
+            else baseline["fetch_seconds"] + baseline["write_seconds"].fillna(0)
+        )
+        rows.append(
+            {
+                "source": source,
+                "runs": len(recent),
+                "rows": latest["rows"],
+                "rows p50": baseline["rows"].median(),
+                "rows/s": latest["rows_per_second"],
+                "rows/s p50": baseline["rows_per_second"].median(),
+                "seconds p50": seconds.quantile(0.5),
+                "seconds p95": seconds.quantile(0.95),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def report(
+    hours: float = 24,
+    window: int = 30,
+    threshold: float = 3.5,
+    history_days: int = 90,
+) -> list[Regression]:
+    """
+    Print how the runs of the last `hours` compare to the rolling baselines of
+    earlier runs and flag the runs that regressed.
+
+    Returns:
+        The regressions found
+    """
+    now = datetime.now()
+    since = now - timedelta(hours=hours)
+    history = load_history(now - timedelta(days=history_days))
+    if history.empty:
+        print("No runs logged yet")
+        return []
+
+    print(f"Runs since {since:%Y-%m-%d %H:%M} against the previous {window} runs")
+    summary = summarize(history, since, window)
+    if summary.empty:
+        print("No runs to check")
+    else:
+        print(summary.to_string(index=False, float_format="{:.1f}".format, na_rep="-"))
+
+    regressions = find_regressions(history, since, window, threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+    else:
+        print("\nNo regressions")
+    return regressions
@@ -31,9 +31,9 @@ class RuntimeLogger:
     def get_last_runtime(self, status: str | None) -> datetime | None:
         try:
             df = pd.read_csv(self.path)
+            if status:
+                df.query(f"Status == '{status}'", inplace=True)  # Filter by status
             if not df.empty:
-                if status:
-                    df.query(f"Status == '{status}'", inplace=True)  # Filter by status
                 last_start_time: datetime = pd.to_datetime(df["Start"].iloc[-1])
                 return datetime(
                     last_start_time.year, last_start_time.month, last_start_time.day
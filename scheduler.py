@@ -0,0 +1,92 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+from orchestrator import Source
+
+
+@dataclass
+class Schedule:
+    source: Source
+    interval: timedelta
+
+
+def close_clients(clients: dict) -> None:
+    """
+    Close cached clients, quitting the browser and HTTP session of Selenium
+    based scrapers.
+    """
+    for client in clients.values():
+        close = getattr(client, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+    clients.clear()
+
+
+class Scheduler:
+    """
+    Run every source on its own cadence in a long-running process.
+
+    Each source keeps its own client cache between ticks, so logins and HTTP
+    sessions are reused, and the database engine stays warm. A tick is skipped
+    when the previous run of that source is still going. After a failed run the
+    source's clients are dropped, so the next tick logs in again.
+    """
+
+    def __init__(
+        self,
+        schedules: list[Schedule],
+        run: Callable[[list[Source], dict], object],
+        poll_seconds: float = 1.0,
+    ):
+        self.schedules = schedules
+        self.run = run
+        self.poll_seconds = poll_seconds
+        self._clients: dict[str, dict] = {s.source.name: {} for s in schedules}
+        self._threads: dict[str, threading.Thread] = {}
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        next_due = {schedule.source.name: time.monotonic() for schedule in self.schedules}
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                for schedule in self.schedules:
+                    name = schedule.source.name
+                    if now < next_due[name]:
+                        continue
+                    next_due[name] = now + schedule.interval.total_seconds()
+                    thread = self._threads.get(name)
+                    if thread is not None and thread.is_alive():
+                        print(f"{name} is still running, skipping this tick")
+                        continue
+                    self._threads[name] = threading.Thread(
+                        target=self._tick,
+                        args=(schedule.source,),
+                        name=f"schedule-{name}",
+                        daemon=True,
+                    )
+                    self._threads[name].start()
+                self._stop.wait(self.poll_seconds)
+        except KeyboardInterrupt:
+            print("Stopping scheduler")
+        finally:
+            for name, clients in self._clients.items():
+                thread = self._threads.get(name)
+                if thread is None or not thread.is_alive():
+                    close_clients(clients)
+
+    def _tick(self, source: Source) -> None:
+        clients = self._clients[source.name]
+        try:
+            self.run([source], clients)
+        except Exception as e:
+            print(f"Scheduled run of {source.name} failed: {e}")
+            close_clients(clients)
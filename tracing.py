@@ -0,0 +1,75 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    source: str | None
+    started_at: datetime
+    parent: Optional["Span"] = None
+    duration_seconds: float = 0.0
+    rows: int | None = None
+    bytes: int | None = None
+    _started: float = field(default=0.0, repr=False)
+
+    def record(self, rows: int | None = None, bytes: int | None = None) -> None:
+        """Add row and byte counts to the span."""
+        if rows is not None:
+            self.rows = (self.rows or 0) + rows
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + bytes
+
+
+class Tracer:
+    """Collects the spans of one run. Spans from all threads end up in `spans`."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        token = _tracer.set(self)
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+_tracer: ContextVar[Tracer | None] = ContextVar("tracer", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, source: str | None = None) -> Iterator[Span]:
+    """
+    Time a stage of the pipeline.
+
+    Spans nest: a span opened inside another becomes its child and inherits its
+    source. Outside an active tracer the span is still yielded but not recorded.
+    The current tracer travels with the context, so threads have to be started
+    in a copy of the context (asyncio.to_thread does this already).
+    """
+    parent = _current_span.get()
+    if source is None and parent is not None:
+        source = parent.source
+    current = Span(name, source, datetime.now(), parent, _started=time.perf_counter())
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.duration_seconds = time.perf_counter() - current._started
+        _current_span.reset(token)
+        tracer = _tracer.get()
+        if tracer is not None:
+            tracer._finish(current)
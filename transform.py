@@ -0,0 +1,86 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable
+import pandas as pd
+from database.mapping import ModelRows, map_columns, to_rows
+from database.validation import validate
+
+# Smaller frames are transformed in-process, shipping them to a pool costs more
+# than it saves
+MIN_PARALLEL_ROWS = 200_000
+CHUNK_ROWS = 50_000
+
+_workers = 1
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def set_transform_workers(workers: int) -> None:
+    """Processes transforming large frames, 1 keeps every transform in-process."""
+    global _workers
+    _workers = max(1, workers)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The pool, started on first use and kept for later runs of a daemon."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked, the fetch and writer threads may hold locks
+            _pool = ProcessPoolExecutor(
+                _workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def map_chunks(function: Callable, data: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> list:
+    """
+    Apply `function` to consecutive row chunks of `data` in the worker
+    processes, or to the whole frame in-process when it is small or only one
+    worker is configured.
+
+    Returns:
+        The results, in the order of the chunks
+    """
+    if _workers <= 1 or len(data) < MIN_PARALLEL_ROWS:
+        return [function(data)]
+    # Row slices are views, each chunk is only copied when pickled for its worker
+    chunks = [
+        data.iloc[start : start + chunk_rows] for start in range(0, len(data), chunk_rows)
+    ]
+    return list(_get_pool().map(function, chunks))
+
+
+def transform_chunk(
+    model_class: type, data: pd.DataFrame
+) -> tuple[ModelRows, pd.DataFrame, pd.Series]:
+    """
+    Validate and map fetched rows.
+
+    Returns:
+        The rows of `model_class`, the rejected fetched rows and their reasons
+    """
+    valid, rejected, reasons = validate(model_class, data)
+    mapped, failed = map_columns(model_class, valid)
+    unconverted = failed != ""
+    if unconverted.any():
+        rejected = pd.concat([rejected, valid[unconverted]])
+        reasons = pd.concat([reasons, failed[unconverted]])
+    return to_rows(model_class, mapped[~unconverted]), rejected, reasons
+
+
+def transform(
+    model_class: type, data: pd.DataFrame
+) -> tuple[ModelRows, pd.DataFrame, pd.Series]:
+    """transform_chunk over the whole frame, on several cores when it is large."""
+    results = map_chunks(partial(transform_chunk, model_class), data)
+    if len(results) == 1:
+        return results[0]
+    rows = ModelRows(model_class)
+    for chunk_rows, _, _ in results:
+        rows.extend(chunk_rows)
+    rejected = pd.concat([chunk_rejected for _, chunk_rejected, _ in results])
+    reasons = pd.concat([chunk_reasons for _, _, chunk_reasons in results])
+    return rows, rejected, reasons
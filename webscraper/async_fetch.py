@@ -0,0 +1,54 @@
+import asyncio
+from typing import Callable, TypeVar
+from webscraper.utils import DateRange
+
+T = TypeVar("T")
+
+# Number of window requests a client keeps in flight at the same time
+DEFAULT_CONCURRENCY = 4
+
+
+async def _gather_windows(
+    windows: list[DateRange],
+    fetch_window: Callable[[DateRange], T],
+    concurrency: int,
+    return_exceptions: bool,
+) -> list[T | BaseException]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(window: DateRange) -> T:
+        async with semaphore:
+            # The clients use blocking requests calls, so each window runs in the
+            # default thread pool while the event loop schedules the fan-out.
+            return await asyncio.to_thread(fetch_window, window)
+
+    return await asyncio.gather(
+        *(run(window) for window in windows),
+        return_exceptions=return_exceptions,
+    )
+
+
+def fetch_windows(
+    windows: list[DateRange],
+    fetch_window: Callable[[DateRange], T],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    return_exceptions: bool = False,
+) -> list[T | BaseException]:
+    """
+    Fetch several date windows concurrently.
+
+    Args:
+        windows: Date windows to fetch
+        fetch_window: Blocking function fetching a single window
+        concurrency: Maximum number of windows in flight at once
+        return_exceptions: Return a window's exception in its slot instead of
+            raising it
+
+    Returns:
+        One result per window, in the same order as `windows`
+    """
+    if not windows:
+        return []
+    return asyncio.run(
+        _gather_windows(windows, fetch_window, concurrency, return_exceptions)
+    )
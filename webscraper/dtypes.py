@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+# A text column becomes categorical when at most this share of its values is distinct
+MAX_UNIQUE_RATIO = 0.5
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Memory used by a frame, including the Python objects it holds."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _categorical(values: pd.Series, max_unique_ratio: float) -> pd.Series:
+    try:
+        distinct = values.nunique(dropna=True)
+    except TypeError:
+        # Lists or dicts from nested JSON cannot be categories
+        return values
+    if distinct <= max_unique_ratio * len(values):
+        return values.astype("category")
+    return values
+
+
+def _downcast(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer")
+    downcast = values.astype(np.float32)
+    # Only when no value changes, amounts like 0.1 have no exact float32
+    if ((downcast.astype(values.dtype) == values) | values.isna()).all():
+        return downcast
+    return values
+
+
+def compact_frame(
+    df: pd.DataFrame, max_unique_ratio: float = MAX_UNIQUE_RATIO
+) -> pd.DataFrame:
+    """
+    Shrink a fetched frame without changing any value: text columns with few
+    distinct values become categoricals, and integers and floats are
+    downcast to the smallest type holding all their values.
+    """
+    if df.empty:
+        return df
+    compacted = df.copy(deep=False)
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        if values.dtype == object or pd.api.types.is_string_dtype(values):
+            compacted[column] = _categorical(values, max_unique_ratio)
+        elif pd.api.types.is_numeric_dtype(values):
+            compacted[column] = _downcast(values)
+    return compacted
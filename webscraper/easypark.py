@@ -1,69 +1,111 @@
 from datetime import datetime
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 import os
 from urllib.parse import urljoin
-from webscraper.utils import DateRange
+from tracing import span
+from webscraper.async_fetch import DEFAULT_CONCURRENCY, fetch_windows
+from webscraper.http_session import ClosableSession
+from webscraper.rate_limit import throttle
+from webscraper.utils import REQUEST_TIMEOUT_SECONDS, DateRange, EnvManager
+from webscraper.window_log import record_window
+from webscraper.window_planner import WindowPlanner
 
 # Documentation: https://external-gw-staging.easyparksystem.net/api/swagger-ui/index.html#/authentication-resource/getJ%20wtUsingPOST
 
 
 class EasyParkAPI:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        operator_id: int = 3340,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
         load_dotenv()
-        self.username = os.getenv("EASYPARK_USERNAME")
-        self.password = os.getenv("EASYPARK_PASSWORD")
-        self._tokens = self._get_tokens()
+        self.concurrency = concurrency
+        self.operator_id = operator_id
+        self.username = username or os.getenv("EASYPARK_USERNAME")
+        self.password = password or os.getenv("EASYPARK_PASSWORD")
+        self.sso_url = EnvManager.get_url(
+            "EASYPARK_SSO_URL", "https://sso.easyparksystem.net/"
+        )
+        self.base_url = EnvManager.get_url(
+            "EASYPARK_BASE_URL", "https://external-gw.easyparksystem.net/"
+        )
+        self.session = ClosableSession()
+        with span("login"):
+            self._tokens = self._get_tokens()
         self.id_token = self._tokens.get("idToken")
         self.refresh_token = self._tokens.get("refreshToken")
 
+    def close(self) -> None:
+        """Close the HTTP session, failing every later request of this client."""
+        self.session.close()
+
     def _get_tokens(self) -> dict:
-        url = "https://sso.easyparksystem.net/api/login"
+        url = urljoin(self.sso_url, "api/login")
+        throttle()
 
-        response = requests.post(
+        response = self.session.post(
             url,
             json={
                 "userName": self.username,
                 "password": self.password,
             },
+            timeout=REQUEST_TIMEOUT_SECONDS,
         )
         response.raise_for_status()
         id_token = response.json().get("idToken", "")
         refresh_token = response.json().get("refreshToken", "")
         return {"idToken": id_token, "refreshToken": refresh_token}
 
-    def get_parking(self, date_range: DateRange):
-        base_url = "https://external-gw.easyparksystem.net/"
+    def get_parking(self, date_range: DateRange, planner: WindowPlanner | None = None):
+        planner = planner or WindowPlanner(rows_per_day=None, target_rows=0)
+        date_ranges = planner.plan(date_range)
+        frames = fetch_windows(
+            date_ranges,
+            self._fetch_window,
+            concurrency=self.concurrency,
+            return_exceptions=True,
+        )
+        # Failed windows are skipped, they were reported through record_window
+        # so the run logs them and the coverage ledger has them re-fetched
+        frames = [frame for frame in frames if isinstance(frame, pd.DataFrame)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _fetch_window(self, date_range: DateRange) -> pd.DataFrame:
         endpoint = "api/export/operator-parkings-standard"
-        url = urljoin(base_url, endpoint)
+        url = urljoin(self.base_url, endpoint)
 
         headers = {
             "X-Authorization": f"Bearer {self.id_token}",
             "Content-Type": "application/json",
         }
-        df = pd.DataFrame()
-
-        date_ranges = date_range.split(interval_days=30)
-        for date_range in date_ranges:
-
-            params = {
-                "from": date_range.start.strftime("%Y-%m-%d"),
-                "to": date_range.end.strftime("%Y-%m-%d"),
-                "operatorId": 3340,
-            }
-
-            response = requests.get(
-                url,
-                headers=headers,
-                params=params,
-            )
+        params = {
+            "from": date_range.start.strftime("%Y-%m-%d"),
+            "to": date_range.end.strftime("%Y-%m-%d"),
+            "operatorId": self.operator_id,
+        }
 
-            response.raise_for_status()
-            data = response.json()
-            df = pd.concat([df, pd.DataFrame(data)], ignore_index=True)
+        with span("http") as http_span:
+            try:
+                throttle()
+                response = self.session.get(
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=REQUEST_TIMEOUT_SECONDS,
+                )
 
-        return df
+                response.raise_for_status()
+                data = pd.DataFrame(response.json())
+            except Exception as e:
+                record_window(date_range, error=str(e))
+                raise
+            http_span.record(rows=len(data), bytes=len(response.content))
+        record_window(date_range, rows=len(data))
+        return data
 
 
 if __name__ == "__main__":
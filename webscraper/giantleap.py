@@ -5,12 +5,21 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 import time
-import requests
 import pandas as pd
 from urllib.parse import urljoin
 from dotenv import load_dotenv
 import json
-from webscraper.utils import Credentials, DateRange, DriverManager, EnvManager
+from tracing import span
+from webscraper.rate_limit import throttle
+from webscraper.timestamps import parse_day_first
+from webscraper.http_session import ClosableSession
+from webscraper.utils import (
+    REQUEST_TIMEOUT_SECONDS,
+    Credentials,
+    DateRange,
+    DriverManager,
+    EnvManager,
+)
 
 
 @dataclass
@@ -54,7 +63,7 @@ class FetchPayload:
 
 class GiantleapSession:
     def __init__(self, creds: Credentials, driver: webdriver.Chrome):
-        self.session = requests.Session()
+        self.session = ClosableSession()
         self.creds = creds
         self.driver = driver
 
@@ -62,9 +71,13 @@ class GiantleapSession:
         # implement login via Selenium (navigate, fill creds, submit)
         """Log in to the Giantleap admin panel."""
 
-        username_input = self.driver.find_element(
+        username_inputs = self.driver.find_elements(
             By.CSS_SELECTOR, "input[placeholder='Brugernavn..']"
         )
+        if not username_inputs:
+            # Reused browser session that is already logged in
+            return
+        username_input = username_inputs[0]
         password_input = self.driver.find_element(
             By.CSS_SELECTOR, "input[placeholder='adgangskode..']"
         )
@@ -88,18 +101,25 @@ class GiantleapSession:
 
 
 class DataFetcher:
-    base_url = "https://vejle-permit.giantleap.no"
-    login_url = urljoin(base_url, "admin.html#/login")
-    reports_url = urljoin(base_url, "admin.html#/dynamic-report/payment-txn-report")
-
-    endpoint = urljoin(
-        base_url,
-        "api/admin/reports/payment-txn-report/preview.json",
-    )
-
-    def __init__(self, session: GiantleapSession, date_range: DateRange):
+    def __init__(
+        self,
+        session: GiantleapSession,
+        date_range: DateRange,
+        operator_id: str = "vejle",
+        base_url: str = "https://vejle-permit.giantleap.no",
+    ):
         self.session = session
         self.date_range = date_range
+        self.operator_id = operator_id
+        self.base_url = EnvManager.get_url("GIANTLEAP_BASE_URL", base_url)
+        self.login_url = urljoin(self.base_url, "admin.html#/login")
+        self.reports_url = urljoin(
+            self.base_url, "admin.html#/dynamic-report/payment-txn-report"
+        )
+        self.endpoint = urljoin(
+            self.base_url,
+            "api/admin/reports/payment-txn-report/preview.json",
+        )
         self.headers = {
             "Accept": "application/json, text/plain, */*",
             "Accept-Encoding": "gzip, deflate, br, zstd",
@@ -116,10 +136,11 @@ class DataFetcher:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",
         }
 
-        self.session.driver.get(self.login_url)
-        time.sleep(2)
-        self.session.login()
-        self.session.set_cookies()
+        with span("login"):
+            self.session.driver.get(self.login_url)
+            time.sleep(2)
+            self.session.login()
+            self.session.set_cookies()
 
     def _get_local_storage(self) -> dict:
         local_storage = self.session.driver.execute_script(
@@ -151,15 +172,28 @@ class DataFetcher:
         payload = FetchPayload(
             date_from=self.date_range.start,
             date_to=self.date_range.end,
+            operatorId=self.operator_id,
         ).to_dict()
 
-        response = self.session.session.post(
-            url=self.endpoint,
-            json=payload,
-            headers=self.headers,
-        )
+        with span("http") as http_span:
+            throttle()
+            response = self.session.session.post(
+                url=self.endpoint,
+                json=payload,
+                headers=self.headers,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+            resp_json = response.json()
+            http_span.record(rows=len(resp_json["rows"]), bytes=len(response.content))
+
+        with span("parse") as parse_span:
+            df = self.parse_report(resp_json)
+            parse_span.record(rows=len(df))
+
+        return df
 
-        resp_json = response.json()
+    @staticmethod
+    def parse_report(resp_json: dict) -> pd.DataFrame:
         columns = [
             col.replace("label.", "").replace(".", "_").strip()
             for col in resp_json["headers"]["columns"]
@@ -170,25 +204,38 @@ class DataFetcher:
             df["amount"].str.replace(",", ".").str.replace(" ", "").astype(float)
         )
         df["vat"] = df["vat"].str.replace(",", ".").str.replace(" ", "").astype(float)
-        df["report_time"] = pd.to_datetime(
-            df["report_time"], format="mixed", dayfirst=True
-        )
+        df["report_time"] = parse_day_first(df["report_time"])
 
         df["payer"] = df["payer"].str.replace("  ", " ").str.strip()
-
         return df
 
 
 class GiantleapScraper:
     def __init__(
-        self, creds: Credentials, date_range: DateRange, headless: bool = False
+        self,
+        creds: Credentials,
+        date_range: DateRange,
+        headless: bool = False,
+        operator_id: str = "vejle",
+        base_url: str = "https://vejle-permit.giantleap.no",
     ):
         self.driver = DriverManager.create(headless=headless)
         self.session = GiantleapSession(creds, self.driver)
         self.date_range = date_range
+        self.operator_id = operator_id
+        self.base_url = base_url
+
+    def close(self) -> None:
+        """Quit the browser and close the HTTP session, failing any call in flight."""
+        try:
+            self.driver.quit()
+        finally:
+            self.session.session.close()
 
     def fetch(self) -> pd.DataFrame:
-        data = DataFetcher(self.session, self.date_range).fetch()
+        data = DataFetcher(
+            self.session, self.date_range, self.operator_id, self.base_url
+        ).fetch()
         return data
 
 
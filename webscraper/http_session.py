@@ -0,0 +1,20 @@
+import requests
+
+
+class ClosableSession(requests.Session):
+    """
+    A requests session that refuses new requests once it has been closed. A
+    closed plain Session opens new connections on its next request, so a source
+    abandoned at its deadline would keep fetching.
+    """
+
+    closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        super().close()
+
+    def request(self, *args, **kwargs) -> requests.Response:
+        if self.closed:
+            raise RuntimeError("Session closed, the source was stopped")
+        return super().request(*args, **kwargs)
@@ -1,24 +1,49 @@
 from datetime import datetime, timezone
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 import os
 from urllib.parse import urljoin
 
-from webscraper.utils import DateRange
+from tracing import span
+from webscraper.async_fetch import DEFAULT_CONCURRENCY, fetch_windows
+from webscraper.http_session import ClosableSession
+from webscraper.rate_limit import throttle
+from webscraper.timestamps import parse_iso_utc_to_local
+from webscraper.utils import REQUEST_TIMEOUT_SECONDS, DateRange, EnvManager
+from webscraper.window_log import record_window
+from webscraper.window_planner import WindowPlanner
 
 
 class ParkOneAPI:
-    def __init__(self, date_range: DateRange):
+    def __init__(
+        self,
+        date_range: DateRange,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        planner: WindowPlanner | None = None,
+        municipality: str = "vejle",
+        api_key: str | None = None,
+    ):
         load_dotenv()
         self.date_range = date_range
-        self._auth_token = os.getenv("PARKONE_API_KEY", "")
+        self.concurrency = concurrency
+        # API docs specify no date ranges > 6 months. We split into at most 30 day intervals to be safe.
+        self.planner = planner or WindowPlanner(rows_per_day=None, target_rows=0)
+        self._auth_token = (
+            api_key if api_key is not None else os.getenv("PARKONE_API_KEY", "")
+        )
         self.headers = {
             "content-type": "application/json",
             "authorization": self._auth_token,
         }
-        self.base_url = "https://api.parkone.dk/v1/"
-        self.municipality = "vejle"
+        self.base_url = EnvManager.get_url(
+            "PARKONE_BASE_URL", "https://api.parkone.dk/v1/"
+        )
+        self.municipality = municipality
+        self.session = ClosableSession()
+
+    def close(self) -> None:
+        """Close the HTTP session, failing every later request of this client."""
+        self.session.close()
 
     def get_all_parkings(self):
         """
@@ -31,38 +56,58 @@ class ParkOneAPI:
         municipality: string 					(Operator)
         zone: string 						(Zone Name)
         """
-        endpoint = "Parkings/getAllParkings"
-        url = urljoin(base=self.base_url, url=endpoint)
-        df = pd.DataFrame()
+        date_ranges = self.planner.plan(self.date_range)
+        frames = fetch_windows(
+            date_ranges,
+            self._fetch_window,
+            concurrency=self.concurrency,
+            return_exceptions=True,
+        )
+        # Failed windows are skipped, they were reported through record_window
+        # so the run logs them and the coverage ledger has them re-fetched
+        frames = [frame for frame in frames if isinstance(frame, pd.DataFrame)]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-        # API docs specify no date ranges > 6 months. We split into 30 day intervals to be safe.
-        date_ranges = self.date_range.split(interval_days=30)
-        for date_range in date_ranges:
-            try:
-                params = {
-                    "municipality": self.municipality,
-                    "startDate": self._dt_ms_format(date_range.start),
-                    "endDate": self._dt_ms_format(date_range.end),
-                }
+        # Convert UTC datetime columns to Copenhagen local time
+        with span("parse") as parse_span:
+            df = self.parse_parkings(df)
+            parse_span.record(rows=len(df))
 
-                response = requests.get(url, headers=self.headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-                df = pd.concat([df, pd.DataFrame(data)], ignore_index=True)
-            except Exception as e:
-                continue
+        return df
 
-        # Convert UTC datetime columns to Copenhagen local time
+    @staticmethod
+    def parse_parkings(df: pd.DataFrame) -> pd.DataFrame:
         for col in ["parkingStartTime", "parkingStopAt"]:
             if col in df.columns:
-                df[col] = (
-                    pd.to_datetime(df[col], format="ISO8601", utc=True)
-                    .dt.tz_convert("Europe/Copenhagen")
-                    .dt.tz_localize(None)
-                )
-
+                df[col] = parse_iso_utc_to_local(df[col])
         return df
 
+    def _fetch_window(self, date_range: DateRange) -> pd.DataFrame:
+        url = urljoin(base=self.base_url, url="Parkings/getAllParkings")
+        params = {
+            "municipality": self.municipality,
+            "startDate": self._dt_ms_format(date_range.start),
+            "endDate": self._dt_ms_format(date_range.end),
+        }
+
+        with span("http") as http_span:
+            try:
+                throttle()
+                response = self.session.get(
+                    url,
+                    headers=self.headers,
+                    params=params,
+                    timeout=REQUEST_TIMEOUT_SECONDS,
+                )
+                response.raise_for_status()
+                data = pd.DataFrame(response.json())
+            except Exception as e:
+                record_window(date_range, error=str(e))
+                raise
+            http_span.record(rows=len(data), bytes=len(response.content))
+        record_window(date_range, rows=len(data))
+        return data
+
     def _dt_ms_format(self, dt: datetime) -> str:
         return (
             dt.astimezone(timezone.utc)
@@ -2,46 +2,98 @@ from datetime import datetime
 import os
 from urllib.parse import urljoin
 import pandas as pd
-import requests
 from dotenv import load_dotenv
-from webscraper.utils import DateRange
+from tracing import span
+from webscraper.async_fetch import DEFAULT_CONCURRENCY, fetch_windows
+from webscraper.http_session import ClosableSession
+from webscraper.rate_limit import throttle
+from webscraper.utils import REQUEST_TIMEOUT_SECONDS, DateRange, EnvManager
+from webscraper.window_log import record_window
 
 
 ## API Documentation: https://documenter.getpostman.com/view/10718386/2sB3QCUEaa
 
 
 class ParkParkAPI:
-    def __init__(self, api_key: str, date_range: DateRange):
+    def __init__(
+        self,
+        api_key: str,
+        date_range: DateRange,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        interval_days: int = 30,
+    ):
         self.api_key = api_key
         self.date_range = date_range
-        self.base_url = "https://spark.parkpark.dk/api/ignition/operator/report/"
+        self.concurrency = concurrency
+        self.interval_days = interval_days
+        self.base_url = EnvManager.get_url(
+            "PARKPARK_BASE_URL",
+            "https://spark.parkpark.dk/api/ignition/operator/report/",
+        )
         self.headers = {
             "Content-Type": "application/json",
             "Accept": "application/json",
             "x-api-key": self.api_key,
         }
+        self.session = ClosableSession()
+
+    def close(self) -> None:
+        """Close the HTTP session, failing every later request of this client."""
+        self.session.close()
 
     def fetch_overview(self) -> pd.DataFrame:
         data = self._fetch_endpoint("overview")["data"]["parking_overview"]
         return pd.DataFrame(data)
 
     def fetch_creditnotes(self) -> pd.DataFrame:
-        data = self._fetch_endpoint("creditnotes")["data"]["creditnotes"]
-        return pd.DataFrame(data)
+        return pd.DataFrame(self._fetch_windows("creditnotes"))
 
     def fetch_parkings(self) -> pd.DataFrame:
-        data = self._fetch_endpoint("parkings")["data"]["parkings"]
-        return pd.DataFrame(data)
+        return pd.DataFrame(self._fetch_windows("parkings"))
+
+    def _fetch_windows(self, endpoint: str) -> list[dict]:
+        """
+        Fetch a list report in date windows and concatenate the rows in window
+        order. Failed windows are skipped, they were reported through
+        record_window so the run logs them and the coverage ledger has them
+        re-fetched.
+        """
+        date_ranges = self.date_range.split(interval_days=self.interval_days)
+        windows = fetch_windows(
+            date_ranges,
+            lambda date_range: self._fetch_window(endpoint, date_range),
+            concurrency=self.concurrency,
+            return_exceptions=True,
+        )
+        return [row for rows in windows if isinstance(rows, list) for row in rows]
+
+    def _fetch_window(self, endpoint: str, date_range: DateRange) -> list[dict]:
+        try:
+            rows = self._fetch_endpoint(endpoint, date_range)["data"][endpoint]
+        except Exception as e:
+            record_window(date_range, error=str(e))
+            raise
+        record_window(date_range, rows=len(rows))
+        return rows
 
-    def _fetch_endpoint(self, endpoint: str):
+    def _fetch_endpoint(self, endpoint: str, date_range: DateRange | None = None):
+        date_range = date_range or self.date_range
         url = urljoin(self.base_url, endpoint)
         payload = {
-            "start": self.date_range.start.strftime("%Y-%m-%d %H:%M:%S"),
-            "end": self.date_range.end.strftime("%Y-%m-%d %H:%M:%S"),
+            "start": date_range.start.strftime("%Y-%m-%d %H:%M:%S"),
+            "end": date_range.end.strftime("%Y-%m-%d %H:%M:%S"),
         }
-        response = requests.get(url, headers=self.headers, params=payload)
-        response.raise_for_status()
-        return response.json()
+        with span("http") as http_span:
+            throttle()
+            response = self.session.get(
+                url,
+                headers=self.headers,
+                params=payload,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+            response.raise_for_status()
+            http_span.record(bytes=len(response.content))
+            return response.json()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be made."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Going below zero reserves a slot, so waiting callers are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+_limiter: RateLimiter | None = None
+
+
+def set_rate_limit(rate: float | None, burst: int = 1) -> None:
+    """Limit the requests of every client in this process. None removes the limit."""
+    global _limiter
+    _limiter = RateLimiter(rate, burst) if rate else None
+
+
+def throttle() -> None:
+    """Wait for the process wide rate budget, if one is set, before a request."""
+    if _limiter is not None:
+        _limiter.acquire()
@@ -4,13 +4,25 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 import time
-import requests
 import pandas as pd
 import logging
 from urllib.parse import urljoin
 from dotenv import load_dotenv
 import numpy as np
-from webscraper.utils import Credentials, DateRange, DriverManager, EnvManager
+from collections import deque
+from tracing import span
+from webscraper.http_session import ClosableSession
+from webscraper.utils import (
+    REQUEST_TIMEOUT_SECONDS,
+    Credentials,
+    DateRange,
+    DriverManager,
+    EnvManager,
+)
+from webscraper.rate_limit import throttle
+from webscraper.timestamps import parse_ms_date
+from webscraper.window_log import record_window
+from webscraper.window_planner import WindowPlanner
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
@@ -63,7 +75,7 @@ class FetchPayload:
 
 class ScanviewSession:
     def __init__(self, creds: Credentials, driver: webdriver.Chrome):
-        self.session = requests.Session()
+        self.session = ClosableSession()
         self.creds = creds
         self.driver = driver
 
@@ -107,9 +119,22 @@ class BaseDataFetcher:
     columns: list[str]
     base_url = "https://admin.scanviewpay.dk/"
 
-    def __init__(self, session: ScanviewSession, date_range: DateRange):
+    def __init__(
+        self,
+        session: ScanviewSession,
+        date_range: DateRange,
+        planner: WindowPlanner | None = None,
+    ):
         self.session = session
         self.date_range = date_range
+        self.base_url = EnvManager.get_url("SCANVIEW_BASE_URL", self.base_url)
+        # Without any history fall back to single day windows
+        self.planner = planner or WindowPlanner(
+            rows_per_day=None,
+            target_rows=FetchPayload.length,
+            default_days=1,
+            max_rows=FetchPayload.length,
+        )
         self.headers = {
             "Accept-Encoding": "gzip, deflate",
             "Accept-Language": "en-US,en;q=0.9",
@@ -125,10 +150,11 @@ class BaseDataFetcher:
             "X-Requested-With": "XMLHttpRequest",
         }
 
-        self.session.driver.get(self.base_url)
-        if self.session.driver.current_url != self.base_url:
-            self.session.login()
-        self.session.set_cookies()
+        with span("login"):
+            self.session.driver.get(self.base_url)
+            if self.session.driver.current_url != self.base_url:
+                self.session.login()
+            self.session.set_cookies()
         self.url = urljoin(self.base_url, self.endpoint)
 
     def total_records(self) -> int:
@@ -138,11 +164,15 @@ class BaseDataFetcher:
             columns=self.columns,
         ).to_dict()
 
-        response = self.session.session.post(
-            url=self.url,
-            data=payload,
-            headers=self.headers,
-        )
+        with span("http") as http_span:
+            throttle()
+            response = self.session.session.post(
+                url=self.url,
+                data=payload,
+                headers=self.headers,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+            http_span.record(bytes=len(response.content))
 
         resp_json = response.json()
         return resp_json.get("iTotalRecords", 0)
@@ -167,71 +197,100 @@ class BaseDataFetcher:
         # If the total records fit in a single request, fetch once
         if total and total <= full_payload.length:
             try:
-                response = self.session.session.post(
-                    url=self.url,
-                    data=full_payload.to_dict(),
-                    headers=self.headers,
-                )
-                response.raise_for_status()
-                data = response.json().get("aaData", [])
-                data_df = pd.DataFrame(data)
+                data_df = pd.DataFrame(self._fetch_page(self.date_range))
+                record_window(self.date_range, rows=len(data_df))
             except Exception as exc:  # pragma: no cover - runtime/network
                 logging.exception("Single-request fetch failed: %s", exc)
+                record_window(self.date_range, error=str(exc))
 
             # proceed to normalization below
         else:
-            # If cannot fetch all data in one request, divide it into ranges.
-            # interval_days = 10 should never exceed the max payload length of 4000
-            for dr in self.date_range.split(interval_days=1):
-                payload = FetchPayload(
-                    date_from=dr.start,
-                    date_to=dr.end,
-                    columns=self.columns,
-                ).to_dict()
-
+            # If cannot fetch all data in one request, divide it into windows
+            # sized from the historical number of rows per day.
+            frames = []
+            windows = deque(self.planner.plan(self.date_range))
+            while windows:
+                dr = windows.popleft()
                 try:
-                    resp = self.session.session.post(
-                        url=self.url,
-                        data=payload,
-                        headers=self.headers,
-                    )
-                    resp.raise_for_status()
-                    date_range_data = resp.json().get("aaData", [])
+                    date_range_data = self._fetch_page(dr)
+                    if self.planner.is_truncated(len(date_range_data)):
+                        if dr.days() > 1:
+                            # Shrink the window and retry both halves in order
+                            logging.info(
+                                "Window %s - %s truncated, splitting", dr.start, dr.end
+                            )
+                            halves = dr.split(interval_days=dr.days() // 2)
+                            windows.extendleft(reversed(halves))
+                            continue
+                        # A single day cannot be split further, page through it
+                        date_range_data += self._fetch_remaining_pages(
+                            dr, len(date_range_data)
+                        )
+                    record_window(dr, rows=len(date_range_data))
                 except Exception as exc:  # pragma: no cover - runtime/network
                     logging.exception(
                         "Failed fetch for %s - %s: %s", dr.start, dr.end, exc
                     )
+                    record_window(dr, error=str(exc))
                     date_range_data = []
 
-                date_range_data = pd.DataFrame(date_range_data)
-                data_df = pd.concat([data_df, date_range_data], ignore_index=True)
+                frames.append(pd.DataFrame(date_range_data))
 
                 # small pause to avoid triggering any rate-limiting
                 # time.sleep(0.05)
+            if frames:
+                data_df = pd.concat(frames, ignore_index=True)
+
+        with span("parse") as parse_span:
+            data_df = self.normalize(data_df)
+            parse_span.record(rows=len(data_df))
+        return data_df
 
+    @classmethod
+    def normalize(cls, data_df: pd.DataFrame) -> pd.DataFrame:
+        """Convert the raw aaData rows to typed columns."""
         for column in set(
-            self._columns_containing(data_df, "date")
-            + self._columns_containing(data_df, "utc"),
+            cls._columns_containing(data_df, "date")
+            + cls._columns_containing(data_df, "utc"),
         ):
-            data_df[column] = self._col_to_datetime(data_df[column])
+            data_df[column] = parse_ms_date(data_df[column])
 
-        for column in self._columns_containing(data_df, "id"):
+        for column in cls._columns_containing(data_df, "id"):
             data_df[column] = data_df[column].astype(int)
 
-        return data_df.drop_duplicates()
+        return data_df
 
-    def _col_to_datetime(self, df_col: pd.Series) -> pd.Series:
-        extracted = pd.to_numeric(df_col.str.extract(r"\((\d+)\)")[0], errors="coerce")
-        # The API returns timestamps with the Copenhagen offset incorrectly subtracted.
-        # We parse as UTC, convert to Copenhagen, then add the offset to correct.
-        utc_dt = pd.to_datetime(extracted, unit="ms", utc=True)
-        cph_dt = utc_dt.dt.tz_convert("Europe/Copenhagen")
-        # Add the timezone offset to correct the source data
-        offset = cph_dt.map(lambda x: x.utcoffset() if pd.notna(x) else pd.Timedelta(0))
-        corrected = (cph_dt + offset).dt.tz_localize(None)  # type: ignore
-        return corrected
-
-    def _columns_containing(self, df: pd.DataFrame, keyword: str) -> list[str]:
+    def _fetch_page(self, date_range: DateRange, start_record: int = 0) -> list[dict]:
+        payload = FetchPayload(
+            date_from=date_range.start,
+            date_to=date_range.end,
+            start_record=start_record,
+            columns=self.columns,
+        ).to_dict()
+        with span("http") as http_span:
+            throttle()
+            response = self.session.session.post(
+                url=self.url,
+                data=payload,
+                headers=self.headers,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+            response.raise_for_status()
+            data = response.json().get("aaData", [])
+            http_span.record(rows=len(data), bytes=len(response.content))
+        return data
+
+    def _fetch_remaining_pages(self, date_range: DateRange, start_record: int) -> list[dict]:
+        rows = []
+        while True:
+            page = self._fetch_page(date_range, start_record=start_record)
+            rows += page
+            start_record += len(page)
+            if not self.planner.is_truncated(len(page)):
+                return rows
+
+    @staticmethod
+    def _columns_containing(df: pd.DataFrame, keyword: str) -> list[str]:
         return [col for col in df.columns.tolist() if keyword.lower() in col.lower()]
 
 
@@ -275,12 +334,19 @@ class ScanviewScraper:
         self.session = ScanviewSession(creds, self.driver)
         self.date_range = date_range
 
-    def get_payment_data(self) -> pd.DataFrame:
-        fetcher = PaymentDataFetcher(self.session, self.date_range)
+    def close(self) -> None:
+        """Quit the browser and close the HTTP session, failing any call in flight."""
+        try:
+            self.driver.quit()
+        finally:
+            self.session.session.close()
+
+    def get_payment_data(self, planner: WindowPlanner | None = None) -> pd.DataFrame:
+        fetcher = PaymentDataFetcher(self.session, self.date_range, planner)
         return fetcher.fetch()
 
-    def get_parking_logs(self) -> pd.DataFrame:
-        fetcher = ParkingLogFetcher(self.session, self.date_range)
+    def get_parking_logs(self, planner: WindowPlanner | None = None) -> pd.DataFrame:
+        fetcher = ParkingLogFetcher(self.session, self.date_range, planner)
         return fetcher.fetch()
 
 
@@ -5,11 +5,20 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 import time
-import requests
 import pandas as pd
 from urllib.parse import urljoin
 from dotenv import load_dotenv
-from webscraper.utils import Credentials, DateRange, DriverManager, EnvManager
+from tracing import span
+from webscraper.rate_limit import throttle
+from webscraper.timestamps import parse_iso
+from webscraper.http_session import ClosableSession
+from webscraper.utils import (
+    REQUEST_TIMEOUT_SECONDS,
+    Credentials,
+    DateRange,
+    DriverManager,
+    EnvManager,
+)
 
 
 @dataclass
@@ -87,14 +96,18 @@ class FetchPayload:
 
 class SolvisionSession:
     def __init__(self, creds: Credentials, driver: webdriver.Chrome):
-        self.session = requests.Session()
+        self.session = ClosableSession()
         self.creds = creds
         self.driver = driver
 
     def login(self) -> None:
         # implement login via Selenium (navigate, fill creds, submit)
         """Log in to the Solvision admin panel."""
-        username_input = self.driver.find_element(By.ID, "username")
+        username_inputs = self.driver.find_elements(By.ID, "username")
+        if not username_inputs:
+            # Reused browser session that is already logged in
+            return
+        username_input = username_inputs[0]
         password_input = self.driver.find_element(By.ID, "password")
 
         username_input.send_keys(self.creds.username)
@@ -110,9 +123,6 @@ class SolvisionSession:
 
 
 class DataFetcher:
-    base_url = "https://portal.solvision.dk"
-    endpoint = "https://api.solvision.dk/mobilbase/api/v1/reports/transactions/72/0"
-    transaction_url = urljoin(base_url, "statistics/transactions")
     columns: list[str] = [
         "id",
         "deviceName",
@@ -131,9 +141,24 @@ class DataFetcher:
         "parkingTime",
     ]
 
-    def __init__(self, session: SolvisionSession, date_range: DateRange):
+    def __init__(
+        self,
+        session: SolvisionSession,
+        date_range: DateRange,
+        meters: list[int] | None = None,
+    ):
         self.session = session
         self.date_range = date_range
+        # None requests the meters of the default operator
+        self.meters = meters
+        self.base_url = EnvManager.get_url(
+            "SOLVISION_BASE_URL", "https://portal.solvision.dk"
+        )
+        self.transaction_url = urljoin(self.base_url, "statistics/transactions")
+        self.endpoint = urljoin(
+            EnvManager.get_url("SOLVISION_API_URL", "https://api.solvision.dk/"),
+            "mobilbase/api/v1/reports/transactions/72/0",
+        )
         self.headers = {
             "Accept": "application/json, text/plain, */*",
             "Accept-Encoding": "gzip, deflate, br, zstd",
@@ -151,9 +176,10 @@ class DataFetcher:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36",
         }
 
-        self.session.driver.get(self.base_url)
-        self.session.login()
-        self.session.set_cookies()
+        with span("login"):
+            self.session.driver.get(self.base_url)
+            self.session.login()
+            self.session.set_cookies()
 
     def _get_local_storage(self) -> dict:
         local_storage = self.session.driver.execute_script(
@@ -188,36 +214,62 @@ class DataFetcher:
         payload = FetchPayload(
             date_from=self.date_range.start,
             date_to=self.date_range.end,
-        ).to_dict()
-
-        response = self.session.session.post(
-            url=self.endpoint,
-            json=payload,
-            headers=self.headers,
         )
+        if self.meters is not None:
+            payload.meters = self.meters
+
+        with span("http") as http_span:
+            throttle()
+            response = self.session.session.post(
+                url=self.endpoint,
+                json=payload.to_dict(),
+                headers=self.headers,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
 
-        resp_json = response.json()
-        data = resp_json["result"].get("data")
+            resp_json = response.json()
+            data = resp_json["result"].get("data")
+            http_span.record(rows=len(data or []), bytes=len(response.content))
+
+        with span("parse") as parse_span:
+            data_df = self.parse_transactions(data)
+            parse_span.record(rows=len(data_df))
+
+        return data_df
+
+    @staticmethod
+    def parse_transactions(data: list[dict]) -> pd.DataFrame:
         data_df = pd.DataFrame(data)
 
         # Convert date columns to datetime
         date_columns = ["paymentTime", "start", "end"]
         for col in date_columns:
-            data_df[col] = pd.to_datetime(data_df[col], format="ISO8601")
-
+            data_df[col] = parse_iso(data_df[col])
         return data_df
 
 
 class SolvisionScraper:
     def __init__(
-        self, creds: Credentials, date_range: DateRange, headless: bool = False
+        self,
+        creds: Credentials,
+        date_range: DateRange,
+        headless: bool = False,
+        meters: list[int] | None = None,
     ):
         self.driver = DriverManager.create(headless=headless)
         self.session = SolvisionSession(creds, self.driver)
         self.date_range = date_range
+        self.meters = meters
+
+    def close(self) -> None:
+        """Quit the browser and close the HTTP session, failing any call in flight."""
+        try:
+            self.driver.quit()
+        finally:
+            self.session.session.close()
 
     def fetch(self) -> pd.DataFrame:
-        data = DataFetcher(self.session, self.date_range).fetch()
+        data = DataFetcher(self.session, self.date_range, self.meters).fetch()
         return data
 
 
@@ -0,0 +1,115 @@
+"""
+Vectorized parsing of the vendors' timestamp formats.
+
+Conversion to Copenhagen time uses a table of the zone's DST transitions,
+built once, so a column is converted with one array lookup rather than a
+timezone conversion per value.
+"""
+
+from functools import cache
+import numpy as np
+import pandas as pd
+
+TIMEZONE = "Europe/Copenhagen"
+_NAT = np.iinfo(np.int64).min
+
+
+@cache
+def transitions() -> tuple[np.ndarray, np.ndarray]:
+    """
+    UTC instants (ns since the epoch) from which the Copenhagen UTC offset
+    changes, and the offset (ns) in effect from each of them.
+    """
+    # Copenhagen only ever changes offset on the hour
+    hours = pd.date_range("1970-01-01", "2100-01-01", freq="h", tz="UTC").as_unit("ns")
+    utc = hours.asi8
+    offsets = hours.tz_convert(TIMEZONE).tz_localize(None).asi8 - utc
+    changes = np.flatnonzero(np.diff(offsets)) + 1
+    starts = np.concatenate([[_NAT], utc[changes]])
+    return starts, np.concatenate([[offsets[0]], offsets[changes]])
+
+
+def _nanoseconds(values: pd.Series) -> np.ndarray:
+    """UTC datetimes (aware or naive) as ns since the epoch, NaT as _NAT."""
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+    return values.astype("datetime64[ns]").to_numpy().view("int64")
+
+
+def _from_nanoseconds(ns: np.ndarray, index: pd.Index) -> pd.Series:
+    return pd.Series(ns.view("datetime64[ns]"), index=index)
+
+
+def utc_offsets(ns: np.ndarray) -> np.ndarray:
+    """Copenhagen UTC offset (ns) at each UTC instant (ns since the epoch)."""
+    starts, offsets = transitions()
+    return offsets[np.searchsorted(starts, ns, side="right") - 1]
+
+
+def utc_to_local(values: pd.Series) -> pd.Series:
+    """Convert UTC datetimes to naive Copenhagen wall time."""
+    ns = _nanoseconds(values)
+    local = np.where(ns == _NAT, _NAT, ns + utc_offsets(ns))
+    return _from_nanoseconds(local, values.index)
+
+
+def parse_ms_date(values: pd.Series) -> pd.Series:
+    """
+    Parse Scanview's "/Date(<ms>)/" strings to naive Copenhagen time.
+
+    The API has already subtracted the Copenhagen offset from the milliseconds.
+    The instant is moved forward by the offset to undo that, and then
+    converted to local time.
+    """
+    # Cut the digits out of "/Date(" and ")/" instead of matching a regex
+    digits = values.astype("string").str.slice(6, -2)
+    digits = digits.where(digits.str.isdigit().fillna(False))
+    ms = pd.to_numeric(digits, errors="coerce").to_numpy(dtype="float64")
+    missing = np.isnan(ms)
+    # Milliseconds fit a float exactly, nanoseconds do not
+    ns = np.where(missing, 0, ms).astype("int64") * 1_000_000
+    corrected = ns + utc_offsets(ns)
+    local = np.where(missing, _NAT, corrected + utc_offsets(corrected))
+    return _from_nanoseconds(local, values.index)
+
+
+def parse_iso(values: pd.Series) -> pd.Series:
+    """Parse ISO 8601 strings, keeping any offset they carry."""
+    return pd.to_datetime(values, format="ISO8601")
+
+
+def parse_iso_utc_to_local(values: pd.Series) -> pd.Series:
+    """Parse ISO 8601 strings in UTC to naive Copenhagen time."""
+    return utc_to_local(pd.to_datetime(values, format="ISO8601", utc=True))
+
+
+def parse_format(
+    values: pd.Series, format: str, cut_at: str | None = None
+) -> pd.Series:
+    """
+    Parse strings with a strptime format, unparseable values become NaT.
+
+    Args:
+        values: Strings to parse
+        format: strptime format of the values
+        cut_at: Characters at the first of which values are cut before parsing,
+            e.g. ".+" drops fractions and offsets from "2025-01-01T10:00:00.000+02:00"
+    """
+    text = values.astype("string")
+    if cut_at:
+        text = text.str.split(f"[{cut_at}]", n=1, regex=True).str[0]
+    return pd.to_datetime(text, format=format, errors="coerce")
+
+
+def parse_day_first(values: pd.Series, format: str = "%d.%m.%Y %H:%M") -> pd.Series:
+    """
+    Parse day-first dates, Giantleap's "31.12.2025 23:59". Values in the
+    expected format are parsed in one pass, only the rest are inferred.
+    """
+    parsed = parse_format(values, format)
+    unparsed = parsed.isna() & values.notna()
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(
+            values[unparsed], format="mixed", dayfirst=True
+        )
+    return parsed
@@ -1,11 +1,16 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+# Seconds an HTTP request or a page load may take before it fails, so a hanging
+# vendor cannot keep a source's thread alive after its deadline
+REQUEST_TIMEOUT_SECONDS = 60
+
 
 @dataclass
 class DateRange:
@@ -44,7 +49,12 @@ class DriverManager:
     @staticmethod
     def create(
         headless: bool = False, start_maximized: bool = True
-    ) -> webdriver.Chrome:
+    ) -> "webdriver.Chrome":
+        # Selenium is slow to import and only the browser scrapers need it
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
         options = Options()
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-background-networking")
@@ -54,7 +64,10 @@ class DriverManager:
         if headless:
             options.add_argument("--headless")
         service = Service()
-        return webdriver.Chrome(service=service, options=options)
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.set_page_load_timeout(REQUEST_TIMEOUT_SECONDS)
+        driver.set_script_timeout(REQUEST_TIMEOUT_SECONDS)
+        return driver
 
 
 class EnvManager:
@@ -67,3 +80,15 @@ class EnvManager:
                 f"Could not find the environment variable {env_name}. Check your .env file."
             )
         return env
+
+    @staticmethod
+    def get_url(env_name: str, default: str) -> str:
+        """
+        Base URL of a vendor, unless overridden by the environment variable
+        `env_name`, e.g. to point a client at a local stub server.
+        """
+        load_dotenv()
+        url = os.getenv(env_name)
+        if not url:
+            return default
+        return url if url.endswith("/") else f"{url}/"
@@ -0,0 +1,52 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator
+from webscraper.utils import DateRange
+
+
+@dataclass
+class WindowResult:
+    date_range: DateRange
+    rows: int = 0
+    error: str | None = None
+    fetched_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class WindowLog:
+    """Collects the outcome of every date window a source fetched, from all threads."""
+
+    def __init__(self):
+        self.windows: list[WindowResult] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["WindowLog"]:
+        token = _window_log.set(self)
+        try:
+            yield self
+        finally:
+            _window_log.reset(token)
+
+    def _add(self, result: WindowResult) -> None:
+        with self._lock:
+            self.windows.append(result)
+
+
+_window_log: ContextVar[WindowLog | None] = ContextVar("window_log", default=None)
+
+
+def record_window(date_range: DateRange, rows: int = 0, error: str | None = None) -> None:
+    """
+    Report that a window has been fetched (or failed). Clients call this for
+    every request window; outside an active WindowLog it does nothing.
+    """
+    window_log = _window_log.get()
+    if window_log is not None:
+        window_log._add(WindowResult(date_range, rows, error))
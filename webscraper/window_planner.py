@@ -0,0 +1,37 @@
+import math
+from dataclasses import dataclass
+from webscraper.utils import DateRange
+
+
+@dataclass
+class WindowPlanner:
+    """
+    Choose request windows from the observed number of rows per day.
+
+    Windows are sized so a request returns about `target_rows` rows. Without any
+    history `default_days` is used.
+    """
+
+    rows_per_day: float | None
+    target_rows: int
+    default_days: int = 30
+    max_days: int = 30
+    # Hard cap on rows a single request returns, e.g. Scanview's page length
+    max_rows: int | None = None
+
+    def interval_days(self) -> int:
+        if not self.rows_per_day:
+            days = self.default_days
+        else:
+            target = self.target_rows
+            if self.max_rows:
+                target = min(target, self.max_rows)
+            days = math.floor(target / self.rows_per_day)
+        return max(1, min(self.max_days, days))
+
+    def plan(self, date_range: DateRange) -> list[DateRange]:
+        return date_range.split(interval_days=self.interval_days())
+
+    def is_truncated(self, rows: int) -> bool:
+        """Whether a response with `rows` rows may have been cut off by `max_rows`."""
+        return self.max_rows is not None and rows >= self.max_rows
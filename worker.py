@@ -0,0 +1,129 @@
+import os
+import socket
+import threading
+from dataclasses import replace
+from datetime import timedelta
+from functools import partial
+import database.operations as db_ops
+from database.jobs import claim_job, finish_job, renew_lease
+from database.writer import DatabaseWriter
+from orchestrator import Source, run_sources
+from scheduler import close_clients
+from webscraper.utils import DateRange
+
+
+class Worker:
+    """
+    Drain the ingest job queue shared through the database.
+
+    Any number of workers, in one or several processes or hosts, can run side
+    by side: each job is claimed atomically and held under a lease that is
+    renewed while the job runs. When a worker dies its lease runs out and the
+    job is claimed again by another worker. Rows are upserted, so a job that
+    ends up running twice does no harm.
+    """
+
+    def __init__(
+        self,
+        sources: list[Source],
+        worker_id: str | None = None,
+        lease: timedelta = timedelta(minutes=5),
+        poll_seconds: float = 10.0,
+        max_attempts: int = 3,
+    ):
+        self.sources = {source.name: source for source in sources}
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = lease
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self._clients: dict[str, dict] = {name: {} for name in self.sources}
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self, until_empty: bool = False) -> int:
+        """
+        Claim and run jobs until stopped, or until the queue is empty.
+
+        Returns:
+            Number of jobs run
+        """
+        jobs_run = 0
+        try:
+            while not self._stop.is_set():
+                with db_ops.get_db() as db:
+                    job = claim_job(db, self.worker_id, self.lease, list(self.sources))
+                    if job is not None:
+                        job_id, source = job.id, self.sources[job.source]
+                        date_range = DateRange(job.window_start, job.window_end)
+                if job is None:
+                    if until_empty:
+                        break
+                    self._stop.wait(self.poll_seconds)
+                    continue
+                self.run_job(job_id, source, date_range)
+                jobs_run += 1
+        except KeyboardInterrupt:
+            print("Stopping worker")
+        finally:
+            for clients in self._clients.values():
+                close_clients(clients)
+        return jobs_run
+
+    def run_job(self, job_id: int, source: Source, date_range: DateRange) -> None:
+        print(
+            f"{self.worker_id}: {source.name} {date_range.start} - {date_range.end} "
+            f"(job {job_id})"
+        )
+        done = threading.Event()
+        lost = threading.Event()
+        renewer = threading.Thread(
+            target=self._keep_leased,
+            args=(job_id, done, lost),
+            name=f"lease-{job_id}",
+            daemon=True,
+        )
+        renewer.start()
+
+        clients = self._clients[source.name]
+        bound = replace(source, fetch=partial(source.fetch, clients=clients))
+        try:
+            [result] = run_sources([bound], {source.name: [date_range]})
+            error = result.error
+            rows = sum(len(table) for table in result.tables)
+            failed = [window for window in result.windows if not window.ok]
+            if failed and error is None:
+                # Keep the rows that were fetched, but run the job again
+                error = f"{len(failed)} window(s) failed: {failed[0].error}"
+            if result.ok and not lost.is_set():
+                # Backfill windows say nothing about late changes or the
+                # watermark, only the coverage ledger is updated
+                writer = DatabaseWriter().start()
+                writer.submit(
+                    source.name, result.tables, result.elapsed, windows=result.windows
+                )
+                writer.close()
+                if writer.failed_sources():
+                    error = "Failed to store data"
+        finally:
+            done.set()
+            renewer.join()
+
+        if error is not None:
+            print(f"{self.worker_id}: job {job_id} failed: {error}")
+            close_clients(clients)
+        if lost.is_set():
+            print(f"{self.worker_id}: lost the lease of job {job_id}, discarding it")
+            return
+        with db_ops.get_db() as db:
+            finish_job(db, job_id, self.worker_id, rows, error, self.max_attempts)
+
+    def _keep_leased(
+        self, job_id: int, done: threading.Event, lost: threading.Event
+    ) -> None:
+        while not done.wait(self.lease.total_seconds() / 3):
+            with db_ops.get_db() as db:
+                if not renew_lease(db, job_id, self.worker_id, self.lease):
+                    lost.set()
+                    return